@@ -0,0 +1,86 @@
+"""Report inputs (features, scores, flags, metrics and export tables) per compute backend, from a CSV.
+
+Run from the project root:  python -m benchmarks.bench_backends --rows 1000000 10000000 --memory-limit 2GB
+Each backend and size runs in its own interpreter, so one that is killed for running out of
+memory (or times out) is reported as such and the others still run.
+"""
+import os
+import sys
+import json
+import signal
+import argparse
+import resource
+import tempfile
+import subprocess
+from benchmarks.common import best_of
+from src.DataGenerator.data_generator import DataGenerator
+from src.ComputeBackend.compute_backend import get_backend
+
+# Exit codes of a process killed by SIGKILL, as the kernel OOM killer does: -9 from
+# subprocess, 137 when a shell or container runtime reports it.
+KILLED = (-signal.SIGKILL, 128 + signal.SIGKILL)
+
+
+def run_one(name, csv_path, memory_limit, temp_directory, repeat):
+    """Time one backend on `csv_path` in this process and print the result as JSON."""
+    options = {"memory_limit": memory_limit, "temp_directory": temp_directory} if name == "duckdb" else {}
+    backend = get_backend(name, **options)
+    seconds, (metrics, _) = best_of(lambda: backend.report(csv_path), repeat)
+    # ru_maxrss is in KiB on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": seconds, "flagged": int(metrics.flagged_count), "peak_mb": peak_mb,
+                      "timings": getattr(backend, "timings", {})}))
+
+
+def measure(name, csv_path, args, temp_directory):
+    """Run `run_one` in a fresh interpreter; (result dict, None) or (None, why it failed)."""
+    command = [sys.executable, "-m", "benchmarks.bench_backends", "--run", name, csv_path,
+               "--repeat", str(args.repeat), "--temp-directory", temp_directory]
+    if args.memory_limit:
+        command += ["--memory-limit", args.memory_limit]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return None, f"timed out after {args.timeout:g}s"
+    if output.returncode in KILLED:
+        return None, f"killed (exit {output.returncode}), likely out of memory"
+    if output.returncode != 0:
+        lines = output.stderr.strip().splitlines()
+        return None, f"failed (exit {output.returncode}): {lines[-1] if lines else 'no output'}"
+    return json.loads(output.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--backends", nargs="+", default=["pandas", "duckdb"])
+    parser.add_argument("--memory-limit", default=None, help="DuckDB memory limit, e.g. 2GB.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a run is stopped.")
+    parser.add_argument("--run", nargs=2, metavar=("BACKEND", "CSV"), help=argparse.SUPPRESS)
+    parser.add_argument("--temp-directory", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(*args.run, args.memory_limit, args.temp_directory, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            csv_path = os.path.join(tmp, f"transactions_{n_rows}.csv")
+            DataGenerator(seed=0).write_csv(csv_path, n_rows)
+            for name in args.backends:
+                result, failure = measure(name, csv_path, args, tmp)
+                if failure:
+                    print(f"{n_rows:>12,} rows | {name:<8} {failure}")
+                    continue
+                print(f"{n_rows:>12,} rows | {name:<8} {result['seconds']:8.3f}s | peak {result['peak_mb']:8,.0f} MB"
+                      f" | flagged {result['flagged']:>10,}")
+                if result["timings"]:
+                    # The score step includes the Python UDF, which holds the GIL and runs serially.
+                    print(" " * 28 + " | ".join(f"{step} {seconds:.3f}s" for step, seconds in result["timings"].items()))
+            os.remove(csv_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Key-hash deduplication and vectorized checks against the old dropna()/drop_duplicates() clean.
+
+Run from the project root:  python -m benchmarks.bench_clean_data --rows 1000000 10000000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from benchmarks.common import make_transactions, best_of
+from src.DataManager.data_manger import DataManagerc
+from src.DataManager.schema import apply_schema, validate_schema
+
+
+def with_rejects(data, share=0.01, seed=0):
+    """`data` plus `share` of its rows again as exact duplicates, some with a negative amount."""
+    rng = np.random.default_rng(seed)
+    extra = data.iloc[rng.integers(0, len(data), int(len(data) * share))].reset_index(drop=True)
+    extra.loc[::10, "amount"] = -extra.loc[::10, "amount"]
+    return pd.concat([data, extra], ignore_index=True)
+
+
+def old_clean(data):
+    # The previous clean_data: whole-row comparison, rejects dropped silently.
+    data.dropna(inplace=True)
+    data.drop_duplicates(inplace=True)
+    apply_schema(data)
+    validate_schema(data)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--object", action="store_true", help="Keep the string columns as object dtype.")
+    args = parser.parse_args()
+
+    dataManager = DataManagerc(use_cache=False)
+    for n_rows in args.rows:
+        data = with_rejects(make_transactions(n_rows))
+        if args.object:
+            data = data.astype({col: object for col in ("type", "nameOrig", "nameDest")})
+        old_time, _ = best_of(lambda: old_clean(data.copy()), args.repeat)
+        new_time, cleaned = best_of(lambda: dataManager.clean_data(data.copy()), args.repeat)
+        rejected = sum(len(frame) for frame in dataManager.rejects) // args.repeat
+        dataManager.rejects = []
+        print(f"{len(data):>12,} rows | rejected {rejected:>9,} | kept {len(cleaned):>12,}"
+              f" | old {old_time:7.3f}s | new {new_time:7.3f}s | speedup x{old_time / new_time:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""One customer's scored transactions: boolean scan of the frame vs the memory-mapped customer index.
+
+Run from the project root:  python -m benchmarks.bench_customer_index --rows 1000000 10000000
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from benchmarks.common import make_transactions, best_of
+from src.ParallelPipeline.parallel_pipeline import ParallelPipeline
+from src.CustomerIndex.customer_index import CustomerIndex
+
+
+def per_lookup_ms(func, customers):
+    start = time.perf_counter()
+    for customer in customers:
+        func(customer)
+    return (time.perf_counter() - start) / len(customers) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            data = ParallelPipeline(workers=1).run(make_transactions(n_rows))
+            build_time, _ = best_of(lambda: CustomerIndex.build(data, os.path.join(tmp, "index")), 1)
+            index = CustomerIndex.open(os.path.join(tmp, "index"))
+            customers = [str(name) for name in rng.choice(np.asarray(index.accounts), args.lookups)]
+
+            scan_ms = per_lookup_ms(lambda customer: data[data["nameOrig"] == customer], customers[:20])
+            history_ms = per_lookup_ms(index.history, customers)
+            profile_ms = per_lookup_ms(index.profile, customers)
+            print(f"{n_rows:>12,} rows | build {build_time:7.3f}s | scan {scan_ms:9.3f}ms"
+                  f" | history {history_ms:7.3f}ms | profile {profile_ms:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
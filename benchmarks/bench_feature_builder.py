@@ -0,0 +1,47 @@
+"""Single-pass FeatureBuilder engine against the previous groupby/join implementation.
+
+Run from the project root:  python -m benchmarks.bench_feature_builder --rows 1000000
+"""
+import argparse
+import numpy as np
+from benchmarks.common import make_transactions, best_of
+from src.FeatureBuilder.feature_builder import FeatureBuilder
+
+
+def groupby_features(data):
+    # The implementation FeatureBuilder.built_feature replaced, kept as the baseline.
+    data["day"] = np.ceil(data["step"] / 24).astype(np.int32)
+    agg_stats = data.groupby("nameOrig", observed=True)["amount"].agg(['count', 'sum', 'mean', 'max', 'std'])
+    agg_stats.columns = ["count_transaction", "total_amount", "avg_amount", "max_amount", "std_amount"]
+    data = data.join(agg_stats, on="nameOrig")
+    data["z_score"] = (data["amount"] - data["avg_amount"]) / data["std_amount"].replace(0, np.nan)
+    data['daily_velocity_count'] = data.groupby(['nameOrig', 'day'], observed=True)['amount'].transform('count')
+    data['errorBalanceOrig'] = data['newbalanceOrig'] + data['amount'] - data['oldbalanceOrg']
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The baseline has no windowed velocity or graph features; their own benchmarks cover those.
+    builder = FeatureBuilder(velocity_windows={}, graph=False)
+    for n_rows in args.rows:
+        data = make_transactions(n_rows)
+        old_time, expected = best_of(lambda: groupby_features(data.copy()), args.repeat)
+        new_time, result = best_of(lambda: builder.built_feature(data.copy()), args.repeat)
+
+        assert list(result.columns) == list(expected.columns)
+        for col in expected.select_dtypes("number").columns:
+            np.testing.assert_allclose(result[col].to_numpy(np.float64, na_value=np.nan),
+                                       expected[col].to_numpy(np.float64, na_value=np.nan),
+                                       rtol=1e-6, equal_nan=True, err_msg=col)
+
+        print(f"{n_rows:>12,} rows | groupby {old_time:8.3f}s | single-pass {new_time:8.3f}s"
+              f" | speedup x{old_time / new_time:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
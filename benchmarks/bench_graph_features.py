@@ -0,0 +1,79 @@
+"""Graph features from the CSR account index against pandas groupby/nunique/merge.
+
+Run from the project root:  python -m benchmarks.bench_graph_features --edges 1000000 5000000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from benchmarks.common import best_of
+from src.FeatureBuilder.graph_features import AccountGraph, GraphFeatureBuilder, shared_account_codes
+
+
+def make_graph(n_edges, n_accounts=None, seed=0):
+    """Transfers between one pool of accounts; receivers are power-law so some become hubs."""
+    rng = np.random.default_rng(seed)
+    n_accounts = n_accounts or max(n_edges // 4, 2)
+    accounts = [f"C{i}" for i in range(n_accounts)]
+    orig = rng.integers(0, n_accounts, n_edges)
+    dest = (rng.zipf(1.3, n_edges) * 7919) % n_accounts
+    amount = np.round(rng.lognormal(8, 1.5, n_edges), 2)
+    old_dest = np.round(rng.lognormal(9, 2, n_edges), 2)
+    return pd.DataFrame({
+        "nameOrig": pd.Categorical.from_codes(orig, accounts),
+        "nameDest": pd.Categorical.from_codes(dest, accounts),
+        "amount": amount,
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": old_dest + amount,
+    })
+
+
+def groupby_features(data):
+    # The same features with pandas joins, the approach the CSR index avoids.
+    orig = data["nameOrig"].astype(str)
+    dest = data["nameDest"].astype(str)
+    edges = pd.DataFrame({"orig": orig, "dest": dest})
+    in_degree = edges.groupby("dest").size()
+    out_degree = edges.groupby("orig").size()
+    both = pd.concat([edges.rename(columns={"orig": "a", "dest": "b"}),
+                      edges.rename(columns={"dest": "a", "orig": "b"})])
+    counterparties = both.groupby("a")["b"].nunique()
+    senders = edges.drop_duplicates()
+    senders = senders.assign(weight=senders["orig"].map(in_degree).fillna(0))
+    fan_in = senders.groupby("dest")["weight"].sum()
+    return {
+        "orig_in_degree": orig.map(in_degree).fillna(0).to_numpy(),
+        "orig_unique_counterparties": orig.map(counterparties).to_numpy(),
+        "dest_in_degree": dest.map(in_degree).to_numpy(),
+        "dest_out_degree": dest.map(out_degree).fillna(0).to_numpy(),
+        "dest_fan_in_2hop": dest.map(fan_in).to_numpy(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-max", type=int, default=1_000_000,
+                        help="Skip the pandas baseline above this many edges.")
+    args = parser.parse_args()
+
+    for n_edges in args.edges:
+        data = make_graph(n_edges)
+        new_time, result = best_of(lambda: GraphFeatureBuilder().built_feature(data.copy()), args.repeat)
+
+        orig, dest, n_accounts = shared_account_codes(data["nameOrig"], data["nameDest"])
+        graph = AccountGraph.from_edges(orig, dest, n_accounts)
+        index_bytes = sum(a.nbytes for a in (graph.indptr, graph.indices, graph.in_indptr, graph.in_indices))
+        line = (f"{n_edges:>12,} edges | {n_accounts:>10,} accounts | CSR {new_time:7.3f}s"
+                f" | index {index_bytes / 2 ** 20:7.1f} MiB ({index_bytes / n_edges:4.1f} B/edge)")
+
+        if n_edges <= args.baseline_max:
+            old_time, expected = best_of(lambda: groupby_features(data), 1)
+            for col, values in expected.items():
+                np.testing.assert_array_equal(result[col].to_numpy(np.float64), values, err_msg=col)
+            line += f" | pandas {old_time:7.3f}s | speedup x{old_time / new_time:5.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Full PDF report build: serial vs pooled chart rendering, and the effect of chart DPI.
+
+Run from the project root:  python -m benchmarks.bench_pdf_report --rows 1000000
+"""
+import argparse
+import tempfile
+from benchmarks.common import make_transactions, best_of
+from src.ParallelPipeline.parallel_pipeline import ParallelPipeline
+from src.GenerateReports.pdf_report import PDFReportGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n_rows in args.rows:
+            data = ParallelPipeline(workers=1).run(make_transactions(n_rows))
+            configs = [("serial, 300 dpi", dict(workers=1)),
+                       (f"{args.workers} workers, 300 dpi", dict(workers=args.workers)),
+                       (f"{args.workers} workers, 150 dpi", dict(workers=args.workers, dpi=150))]
+            for label, options in configs:
+                generator = PDFReportGenerator(output_dir=output_dir, **options)
+                seconds, _ = best_of(lambda: generator.generate_pdf(data), args.repeat)
+                print(f"{n_rows:>12,} rows | {label:<22} {seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Cold-start cost of the interactive console: import src.Console_App and build ConsoleApp.
+
+Run from the project root:  python -m benchmarks.bench_startup --budget 0.5
+Exits non-zero when a heavy dependency is imported at startup or the budget is exceeded,
+so it can guard against startup regressions.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ["pandas", "numpy", "scipy", "matplotlib", "reportlab", "pyarrow"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.Console_App
+src.Console_App.ConsoleApp()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure():
+    # A fresh interpreter per sample, so nothing is already imported.
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="Fail if the median exceeds this many seconds.")
+    args = parser.parse_args()
+
+    samples = [measure() for _ in range(args.repeat)]
+    median = statistics.median(sample["seconds"] for sample in samples)
+    loaded = sorted({module for sample in samples for module in sample["loaded"]})
+
+    print(f"ConsoleApp startup: median {median * 1000:.1f} ms over {args.repeat} runs")
+    print(f"Heavy modules imported at startup: {', '.join(loaded) or 'none'}")
+
+    if loaded or (args.budget is not None and median > args.budget):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
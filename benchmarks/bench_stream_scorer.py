@@ -0,0 +1,76 @@
+"""Load generator for the streaming scorer, run against a local in-process server.
+
+Run from the project root:  python -m benchmarks.bench_stream_scorer --history 100000 --requests 5000
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+import numpy as np
+from benchmarks.common import make_transactions
+from src.StreamScorer.stream_scorer import StreamScorer
+
+
+def make_requests(n_requests, n_customers, seed=1):
+    rng = np.random.default_rng(seed)
+    customers = rng.zipf(1.5, n_requests) % n_customers
+    amount = np.round(rng.lognormal(8, 1.5, n_requests), 2)
+    balance = np.round(rng.lognormal(9, 2, n_requests), 2)
+    steps = np.sort(rng.integers(744, 744 + 24 * 7, n_requests))
+    return [{"id": i, "step": int(steps[i]), "nameOrig": f"C{customers[i]}", "amount": float(amount[i]),
+             "oldbalanceOrg": float(balance[i]), "newbalanceOrig": float(max(balance[i] - amount[i], 0))}
+            for i in range(n_requests)]
+
+
+def run_client(address, requests, batch_size):
+    """Send `requests` in order, `batch_size` per line, waiting for each reply; return round trips in ms."""
+    latencies = []
+    with socket.create_connection(address) as conn:
+        reader = conn.makefile("rb")
+        for start in range(0, len(requests), batch_size):
+            batch = requests[start:start + batch_size]
+            line = json.dumps(batch[0] if batch_size == 1 else batch) + "\n"
+            sent = time.perf_counter()
+            conn.sendall(line.encode("utf-8"))
+            reply = json.loads(reader.readline())
+            latencies.append((time.perf_counter() - sent) * 1000)
+            if isinstance(reply, dict) and "error" in reply:
+                raise RuntimeError(reply["error"])
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, default=100_000, help="Rows that seed the customer state.")
+    parser.add_argument("--requests", type=int, default=5_000, help="Transactions sent per batch size.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    history = make_transactions(args.history)
+    n_customers = len(history["nameOrig"].cat.categories)
+    start = time.perf_counter()
+    scorer = StreamScorer.from_history(history)
+    print(f"seeded {args.history:,} rows / {len(scorer.state):,} customers in {time.perf_counter() - start:.3f}s")
+
+    server = scorer.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for batch_size in args.batch_sizes:
+            scorer.latency = type(scorer.latency)()
+            requests = make_requests(args.requests, n_customers, seed=batch_size)
+            start = time.perf_counter()
+            round_trips = run_client(server.server_address, requests, batch_size)
+            elapsed = time.perf_counter() - start
+            p50, p99 = np.percentile(round_trips, [50, 99])
+            inside = scorer.latency.summary()
+            print(f"batch {batch_size:>4} | {len(requests) / elapsed:9,.0f} tx/s"
+                  f" | round trip p50 {p50:7.3f}ms p99 {p99:7.3f}ms"
+                  f" | scorer p50 {inside['p50_ms']:7.3f}ms p99 {inside['p99_ms']:7.3f}ms")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
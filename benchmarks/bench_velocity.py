@@ -0,0 +1,63 @@
+"""Windowed velocity features: sort-once searchsorted kernel against groupby().rolling().
+
+Run from the project root:  python -m benchmarks.bench_velocity --rows 1000000 10000000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from benchmarks.common import make_transactions, best_of
+from src.FeatureBuilder.feature_builder import VELOCITY_WINDOWS, account_codes, window_velocity
+
+
+def rolling_velocity(data):
+    # A per-account time-based rolling window, the approach the kernel avoids.
+    frame = pd.DataFrame({
+        "nameOrig": data["nameOrig"].to_numpy(),
+        "time": pd.to_datetime(data["step"].to_numpy(), unit="h"),
+        "amount": data["amount"].to_numpy(),
+        "row": np.arange(len(data)),
+    }).sort_values(["nameOrig", "time"], kind="stable")
+    features = {}
+    for label, hours in VELOCITY_WINDOWS.items():
+        rolled = frame.groupby("nameOrig", observed=True).rolling(f"{hours}h", on="time")["amount"]
+        counts, sums = rolled.count().to_numpy(), rolled.sum().to_numpy()
+        # rolling() ends the window at each row, so rows later in the same step are not counted yet;
+        # take the value at the last row of each (account, step) like the kernel does.
+        last = frame.groupby(["nameOrig", "time"], observed=True)["row"].transform("size").to_numpy()
+        position = np.arange(len(frame))
+        end = position + last - 1 - (frame.groupby(["nameOrig", "time"], observed=True).cumcount().to_numpy())
+        count, total = np.empty(len(frame)), np.empty(len(frame))
+        count[frame["row"].to_numpy()] = counts[end]
+        total[frame["row"].to_numpy()] = sums[end]
+        features[f"velocity_count_{label}"] = count
+        features[f"velocity_amount_{label}"] = total
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline-max", type=int, default=1_000_000,
+                        help="Skip the rolling() baseline above this many rows; it is slow.")
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        data = make_transactions(n_rows)
+        codes, _ = account_codes(data["nameOrig"])
+        step = data["step"].to_numpy()
+        amount = data["amount"].to_numpy(dtype=np.float64)
+
+        new_time, result = best_of(lambda: window_velocity(codes, step, amount), args.repeat)
+        line = f"{n_rows:>12,} rows | searchsorted {new_time:8.3f}s ({n_rows / new_time / 1e6:5.1f}M rows/s)"
+
+        if n_rows <= args.baseline_max:
+            old_time, expected = best_of(lambda: rolling_velocity(data), 1)
+            for col, values in expected.items():
+                np.testing.assert_allclose(result[col], values, rtol=1e-9, atol=1e-6, err_msg=col)
+            line += f" | groupby().rolling() {old_time:8.3f}s | speedup x{old_time / new_time:5.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
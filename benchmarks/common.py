@@ -0,0 +1,17 @@
+import time
+from src.DataGenerator.data_generator import DataGenerator
+
+
+def make_transactions(n_rows, n_customers=None, seed=0):
+    """Seeded PaySim-shaped frame in the compact schema, from the project's data generator."""
+    return DataGenerator(seed=seed, n_customers=n_customers).generate(n_rows)
+
+
+def best_of(func, repeat=3):
+    """Fastest wall time of `repeat` calls to `func` and the result of the last call."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,106 @@
+"""Time and memory-profile every pipeline stage on generated data, writing comparable JSON results.
+
+Run from the project root:
+    python -m benchmarks.suite --rows 10000 1000000 10000000 --output bench_results.json
+    python -m benchmarks.suite --rows 10000 --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.DataGenerator.data_generator import DataGenerator
+from src.StageProfiler.stage_profiler import StageProfiler
+
+
+def run_pipeline(csv_path, output_dir, trace_memory=True):
+    # Imported here so the suite measures the stages, not their import time.
+    from src.DataManager.data_manger import DataManagerc
+    from src.FeatureBuilder.feature_builder import FeatureBuilder
+    from src.RiskScore.risk_score import RiskScorer
+    from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+    from src.GenerateReports.generate_reports import GenerateReports
+
+    # tracemalloc sees NumPy and pandas buffers too, but slows pure-Python code (reports) noticeably.
+    profiler = StageProfiler(trace_memory=trace_memory)
+    dataManager = DataManagerc(use_cache=False)
+    data = profiler.measure("load_data", dataManager.load_data, csv_path)
+    data = profiler.measure("clean_data", dataManager.clean_data, data)
+    data = profiler.measure("built_feature", FeatureBuilder().built_feature, data)
+    data = profiler.measure("compute_scores", RiskScorer().compute_scores, data)
+    data = profiler.measure("is_suspicious", TransactionFlagger().is_suspicious, data)
+    profiler.measure("generate_reports", GenerateReports(output_dir=output_dir).generate_reports, data)
+    return [record.to_dict() for record in profiler.records]
+
+
+def compare(results, baseline):
+    old = {(r["rows"], r["stage"]): r for r in baseline["results"]}
+    print(f"\n{'rows':>12} {'stage':<18} {'seconds':>10} {'baseline':>10} {'ratio':>7} {'peak MiB':>10} {'baseline':>10}")
+    for r in results:
+        b = old.get((r["rows"], r["stage"]))
+        if b is None:
+            continue
+        ratio = r["wall_s"] / b["wall_s"] if b["wall_s"] else float("nan")
+        print(f"{r['rows']:>12,} {r['stage']:<18} {r['wall_s']:>10.3f} {b['wall_s']:>10.3f} {ratio:>6.2f}x"
+              f" {str(r['alloc_peak_mib']):>10} {str(b['alloc_peak_mib']):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.0, help="Customer skew of the generated data.")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", default=None, help="Print the ratio against an earlier results file.")
+    parser.add_argument("--keep-data", default=None, help="Keep the generated CSVs in this folder.")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="Skip tracemalloc for undistorted timings; only peak RSS is recorded.")
+    args = parser.parse_args()
+
+    work_dir = args.keep_data or tempfile.mkdtemp(prefix="bank-bench-")
+    results = []
+    try:
+        for n_rows in args.rows:
+            csv_path = os.path.join(work_dir, f"paysim_{n_rows}_seed{args.seed}.csv")
+            if not os.path.exists(csv_path):
+                DataGenerator(seed=args.seed, skew=args.skew).write_csv(csv_path, n_rows)
+            reports_dir = os.path.join(work_dir, f"reports_{n_rows}")
+            for result in run_pipeline(csv_path, reports_dir, trace_memory=not args.no_trace_memory):
+                result = {"rows": n_rows, **result}
+                results.append(result)
+                print(f"{n_rows:>12,} {result['stage']:<18} {result['wall_s']:>9.3f}s  cpu {result['cpu_s']:>9.3f}s"
+                      f"  peak alloc {str(result['alloc_peak_mib']):>9} MiB  peak RSS {result['peak_rss_mib']} MiB",
+                      flush=True)
+    finally:
+        if args.keep_data is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "skew": args.skew,
+            "trace_memory": not args.no_trace_memory,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,18 @@
-from src.Console_App import ConsoleApp
+import sys
 
-app=ConsoleApp()
-app.run()
+
+def main():
+    if len(sys.argv) > 1:
+        # Any arguments mean a headless run, which never needs the interactive console.
+        from src.BatchRunner.batch_runner import main as run_batch
+        return run_batch(sys.argv[1:])
+
+    from src.Console_App import ConsoleApp
+
+    app=ConsoleApp()
+    app.run()
+
+
+# Guarded so process pools that spawn workers (the default on Windows) can import this module.
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from datetime import datetime
 import  os
+from model.reports.report_metrics import ReportMetrics
 
 
 ## Note: I used Claude to help generate a well-structured and professional report.
@@ -12,19 +13,21 @@ class Report:
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir,exist_ok=True)
 
-    def report_txt(self,data):
+    def report_txt(self,data,metrics=None):
 
         report_summary_path = os.path.join(self.output_dir, "Report_Summary.txt")
-        flagged=data[data["is_suspicious"]==True]
+        metrics = metrics or ReportMetrics.for_data(data)
 
-        with open(report_summary_path, 'w', encoding='utf-8') as f:
+        # Written next to the final path and renamed into place once complete.
+        tmp_path = f"{report_summary_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
 
-            total_transactions = len(data)
-            total_flagged = len(flagged)
-            flagged_percentage = (total_flagged / total_transactions * 100) if total_transactions else 0
-            risk_distribution = data['risk_band'].value_counts()
-            top_5_flagged = flagged['nameOrig'].value_counts().head(5)
-            top_5_risky = data.sort_values(by="final_risk_score", ascending=False).head(5)
+            total_transactions = metrics.total
+            total_flagged = metrics.flagged_count
+            flagged_percentage = metrics.flagged_pct
+            risk_distribution = metrics.band_counts
+            top_5_flagged = metrics.top_flagged_customers.head(5)
+            top_5_risky = metrics.top_risky.head(5)
 
 
             f.write("=" * 80 + "\n")
@@ -105,3 +108,5 @@ class Report:
             f.write("\n" + "=" * 80 + "\n")
             f.write("END OF REPORT".center(80) + "\n")
             f.write("=" * 80 + "\n")
+
+        os.replace(tmp_path, report_summary_path)
@@ -0,0 +1,159 @@
+import zlib
+import weakref
+import numpy as np
+import pandas as pd
+
+
+class ReportMetrics:
+    """Everything the CSV, TXT, PDF and console outputs report, computed once per scored frame.
+
+    Holds the flagged row positions, histogram bin counts instead of amounts, band and flag
+    counts, the top-k riskiest rows and the customers with the most flagged transactions, so
+    building the outputs costs the same no matter how many transactions were scored.
+
+    `for_data` caches the result per frame and recomputes it when the frame's input columns
+    are replaced or their contents change.
+    """
+
+    TOP_COLUMNS = ["nameOrig", "amount", "final_risk_score", "risk_band"]
+    INPUT_COLUMNS = ["is_suspicious", "risk_band", "final_risk_score", "amount", "nameOrig"]
+    CACHE_SIZE = 4
+    _cache = {}
+
+    def __init__(self, total, flagged_count, band_counts, amount_edges, normal_amount_counts,
+                 flagged_amount_counts, top_risky, top_flagged_customers, mean_score, max_score,
+                 log_bins=False, flagged_rows=None):
+        self.total = total
+        self.flagged_rows = flagged_rows
+        self.flagged_count = flagged_count
+        self.normal_count = total - flagged_count
+        self.flagged_pct = (flagged_count / total * 100) if total else 0
+        self.band_counts = band_counts
+        self.amount_edges = amount_edges
+        self.normal_amount_counts = normal_amount_counts
+        self.flagged_amount_counts = flagged_amount_counts
+        self.top_risky = top_risky
+        self.top_flagged_customers = top_flagged_customers
+        self.mean_score = mean_score
+        self.max_score = max_score
+        self.log_bins = log_bins
+
+    @classmethod
+    def for_data(cls, data, bins=30, log_bins=False, top_k=10):
+        """Cached metrics for `data`, recomputed only if the frame changed since the last call."""
+        if data is None or len(data) == 0:
+            raise ValueError("Dataframe is empty or None!")
+
+        key = (id(data), bins, log_bins, top_k)
+        fingerprint = cls.fingerprint(data)
+        cached = cls._cache.get(key)
+        if cached is not None and cached[0]() is data and cached[1] == fingerprint:
+            return cached[2]
+
+        metrics = cls.from_data(data, bins=bins, log_bins=log_bins, top_k=top_k)
+        if len(cls._cache) >= cls.CACHE_SIZE:
+            cls._cache.pop(next(iter(cls._cache)))
+        cls._cache[key] = (weakref.ref(data), fingerprint, metrics)
+        return metrics
+
+    @classmethod
+    def fingerprint(cls, data):
+        """Cheap identity of the input columns: row count, index, and a CRC of each column's values."""
+        parts = [len(data), id(data.index)]
+        for col in cls.INPUT_COLUMNS:
+            values = data[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                parts.append(id(values.cat.categories))
+                values = values.cat.codes.to_numpy()
+            else:
+                values = values.to_numpy()
+            if values.dtype == object:
+                values = pd.util.hash_array(values)
+            parts.append(zlib.crc32(np.ascontiguousarray(values)))
+        return tuple(parts)
+
+    def flagged(self, data):
+        """The flagged rows of the frame these metrics were computed from."""
+        return data.iloc[self.flagged_rows]
+
+    @classmethod
+    def from_data(cls, data, bins=30, log_bins=False, top_k=10):
+        if data is None or len(data) == 0:
+            raise ValueError("Dataframe is empty or None!")
+
+        flags = data["is_suspicious"].to_numpy(dtype=bool)
+        flagged_count = int(flags.sum())
+
+        band_counts = data["risk_band"].value_counts()
+        band_counts = band_counts[band_counts > 0]
+
+        edges, normal_counts, flagged_counts = cls.amount_histogram(
+            data["amount"].to_numpy(dtype=np.float64), flags, bins, log_bins)
+
+        scores = data["final_risk_score"]
+        return cls(
+            total=len(data),
+            flagged_count=flagged_count,
+            band_counts=band_counts,
+            amount_edges=edges,
+            normal_amount_counts=normal_counts,
+            flagged_amount_counts=flagged_counts,
+            top_risky=data.nlargest(top_k, "final_risk_score")[cls.TOP_COLUMNS],
+            top_flagged_customers=cls.top_flagged(data["nameOrig"], flags, top_k),
+            mean_score=float(scores.mean()),
+            max_score=float(scores.max()),
+            log_bins=log_bins,
+            flagged_rows=np.flatnonzero(flags),
+        )
+
+    @staticmethod
+    def amount_histogram(amount, flags, bins, log_bins):
+        """Shared bin edges and per-bin counts of normal and flagged amounts.
+
+        Fixed bins span the full amount range like matplotlib's default; log-spaced bins
+        start at the smallest positive amount, so zero amounts are left out.
+        """
+        finite = np.isfinite(amount)
+        if not finite.all():
+            amount, flags = amount[finite], flags[finite]
+        positive = amount[amount > 0] if log_bins else amount
+        edges = ReportMetrics.amount_edges(
+            amount.min() if len(amount) else None, amount.max() if len(amount) else None,
+            positive.min() if len(positive) else None, positive.max() if len(positive) else None,
+            bins, log_bins)
+
+        # Same binning as np.histogram: half-open bins except the last, which is closed.
+        index = np.searchsorted(edges, amount, side="right") - 1
+        index[amount == edges[-1]] = bins - 1
+        inside = (index >= 0) & (index < bins)
+        counts = np.bincount(index[inside] * 2 + flags[inside], minlength=2 * bins)
+        counts = counts.reshape(bins, 2)
+        return edges, counts[:, 0], counts[:, 1]
+
+    @staticmethod
+    def amount_edges(low, high, low_positive, high_positive, bins, log_bins):
+        """Histogram edges from the finite amounts' range (None when there are none)."""
+        if log_bins:
+            low, high = (1.0, 10.0) if low_positive is None else (low_positive, high_positive)
+            return np.geomspace(low, high if high > low else low * 10, bins + 1)
+        low, high = (0.0, 1.0) if low is None else (low, high)
+        return np.linspace(low, high if high > low else low + 1, bins + 1)
+
+    @staticmethod
+    def top_flagged(customers, flags, top_k):
+        """Customers with the most flagged transactions, most first."""
+        flagged = customers[flags]
+        if isinstance(flagged.dtype, pd.CategoricalDtype):
+            codes = flagged.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(flagged.cat.categories))
+            labels = flagged.cat.categories
+        else:
+            counts_series = flagged.value_counts()
+            counts, labels = counts_series.to_numpy(), counts_series.index
+
+        k = min(top_k, int((counts > 0).sum()))
+        if k == 0:
+            return pd.Series(dtype=np.int64, name="count")
+        top = np.argpartition(-counts, k - 1)[:k]
+        top = top[np.lexsort((top, -counts[top]))]
+        return pd.Series(counts[top], index=pd.Index(np.asarray(labels)[top], name="nameOrig"), name="count")
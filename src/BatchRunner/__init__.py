@@ -0,0 +1 @@
+from src.BatchRunner import batch_runner
\ No newline at end of file
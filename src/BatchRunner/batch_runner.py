@@ -0,0 +1,419 @@
+import argparse
+import json
+import sys
+import time
+from src.StageProfiler.stage_profiler import StageProfiler
+
+
+STAGES = ["load", "clean", "features", "score", "flag", "report"]
+
+
+class BatchRunner:
+    """Runs the pipeline stages without prompts, timing each one.
+
+    Stage modules are imported only when their stage runs, so a run that stops before
+    `report` never loads matplotlib or reportlab.
+
+    With a `backend` other than pandas, features, scoring, flagging and reports run in that
+    engine straight from the input file, which must already be clean.
+
+    Each stage declares the columns it requires and produces. Unless `project_columns` is
+    off, only the CSV columns some stage requires are read, and a column produced by a stage
+    is dropped once no later stage needs it.
+    """
+
+    def __init__(self, input_path, output_dir="Reports", stages=None, workers=1,
+                 use_cache=True, keep_zscores=True, chart_dpi=300, chart_format="png", log_bins=False,
+                 export_format="csv", compression=None, partition_by=None, model_path=None, save_model_path=None,
+                 profiler=None, dedup_key=None, quarantine_dir="quarantine", project_columns=True,
+                 backend="pandas", memory_limit=None, customer_index=True):
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.stages = self.resolve_stages(stages)
+        self.workers = workers
+        self.use_cache = use_cache
+        self.keep_zscores = keep_zscores
+        self.chart_dpi = chart_dpi
+        self.chart_format = chart_format
+        self.log_bins = log_bins
+        self.export_format = export_format
+        self.compression = compression
+        self.partition_by = partition_by
+        self.model_path = model_path
+        self.save_model_path = save_model_path
+        self.dedup_key = dedup_key
+        self.quarantine_dir = quarantine_dir
+        self.project_columns = project_columns
+        self.backend = backend
+        self.memory_limit = memory_limit
+        self.customer_index = customer_index
+        self.columns = None
+        self.unused_columns = {}
+        self.table_columns = None
+        self.data = None
+        self.profiler = profiler or StageProfiler()
+
+    @staticmethod
+    def resolve_stages(stages):
+        """Requested stages in pipeline order; `load` always runs since every stage needs data."""
+        if stages is None or stages == ["all"]:
+            return list(STAGES)
+        unknown = [stage for stage in stages if stage not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {', '.join(unknown)}. Choose from: {', '.join(STAGES)}")
+        return [stage for stage in STAGES if stage == "load" or stage in stages]
+
+    def run(self):
+        stages = list(self.stages)
+        if self.backend != "pandas":
+            stages = self._backend_stages(stages)
+        # The parallel executor covers features, scoring and flagging in one go.
+        if self.workers > 1 and {"features", "score", "flag"} <= set(stages):
+            start = stages.index("features")
+            stages[start:start + 3] = ["parallel"]
+        if self.project_columns and "backend" not in stages:
+            self.columns, self.unused_columns = self.plan_columns(stages)
+            if self.customer_index and "report" in stages:
+                self.table_columns = self.plan_table_columns(stages)
+
+        for stage in stages:
+            try:
+                with self.profiler.stage(stage, rows_in=0 if self.data is None else len(self.data)) as record:
+                    getattr(self, f"_run_{stage}")()
+                    self._drop_unused(stage)
+                    record.rows_out = 0 if self.data is None else len(self.data)
+            except Exception as e:
+                raise RuntimeError(f"stage '{stage}' failed: {e}") from e
+            print(f"[{stage:<8}] {record.wall_s:9.3f}s  cpu {record.cpu_s:9.3f}s"
+                  f"  rows in {record.rows_in:>12,}  rows out {record.rows_out:>12,}", flush=True)
+
+        total = sum(record.wall_s for record in self.profiler.records)
+        print(f"[{'total':<8}] {total:9.3f}s")
+        return self.data
+
+    def stage_columns(self, stage):
+        """(required, produced) columns of one stage, as the stage object declares them."""
+        if stage == "load":
+            return [], []
+        if stage == "parallel":
+            declared = [self.stage_columns(part) for part in ("features", "score", "flag")]
+            produced = [col for _, cols in declared for col in cols]
+            required = [col for cols, _ in declared for col in cols if col not in produced]
+            return list(dict.fromkeys(required)), produced
+        if stage == "score":
+            from src.RiskScore.risk_score import RiskScorer
+            from src.RiskScore.risk_model import RiskModel
+            model = RiskModel.load(self.model_path) if self.model_path else None
+            scorer = RiskScorer()
+            return scorer.required_columns(model), scorer.produced_columns(self.keep_zscores, model)
+
+        if stage == "clean":
+            owner = self._data_manager()
+        elif stage == "features":
+            from src.FeatureBuilder.feature_builder import FeatureBuilder
+            owner = FeatureBuilder()
+        elif stage == "flag":
+            from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+            owner = TransactionFlagger()
+        else:
+            owner = self._reports()
+        return owner.required_columns(), owner.produced_columns()
+
+    def plan_columns(self, stages):
+        """The CSV columns `stages` need (None for all), and per stage the produced columns to drop after it."""
+        from src.DataManager.schema import TRANSACTION_SCHEMA
+        declared = [self.stage_columns(stage) for stage in stages]
+
+        # needed_after[i]: every column some stage after stage i requires.
+        needed_after = [set() for _ in stages]
+        for i in range(len(stages) - 2, -1, -1):
+            needed_after[i] = needed_after[i + 1] | set(declared[i + 1][0])
+
+        unused, produced = {}, []
+        for i, stage in enumerate(stages):
+            produced += declared[i][1]
+            # The last stage's output is the run's result, so nothing is dropped after it.
+            if i < len(stages) - 1:
+                unused[stage] = [col for col in dict.fromkeys(produced) if col not in needed_after[i]]
+
+        if len(stages) == 1:
+            return None, unused
+        return [col for col in TRANSACTION_SCHEMA if col in needed_after[0]], unused
+
+    def plan_table_columns(self, stages):
+        """The columns the report stage would get if the customer index needed nothing extra.
+
+        The index keeps every feature column alive until the report; the exported tables
+        are cut back to these, so they match a run without the index.
+        """
+        from src.DataManager.schema import TRANSACTION_SCHEMA
+        index, self.customer_index = self.customer_index, False
+        try:
+            columns, unused = self.plan_columns(stages)
+            declared = [self.stage_columns(stage) for stage in stages]
+        finally:
+            self.customer_index = index
+        kept = list(TRANSACTION_SCHEMA if columns is None else columns)
+        for stage, (_, produced) in zip(stages, declared):
+            if stage == "report":
+                break
+            kept = [col for col in dict.fromkeys(kept + produced) if col not in unused.get(stage, [])]
+        return kept
+
+    def _drop_unused(self, stage):
+        if self.data is None:
+            return
+        unused = [col for col in self.unused_columns.get(stage, []) if col in self.data.columns]
+        if unused:
+            self.data.drop(columns=unused, inplace=True)
+
+    def _keep_zscores(self, stage):
+        # Z-scores no later stage reads are not written at all, rather than written and dropped.
+        return self.keep_zscores and not any(col.endswith("_zscore") for col in self.unused_columns.get(stage, []))
+
+    def _data_manager(self):
+        from src.DataManager.data_manger import DataManagerc
+        return DataManagerc(use_cache=self.use_cache, dedup_key=self.dedup_key,
+                            quarantine_dir=self.quarantine_dir, columns=self.columns)
+
+    def _reports(self):
+        from src.GenerateReports.generate_reports import GenerateReports
+        return GenerateReports(output_dir=self.output_dir, chart_dpi=self.chart_dpi,
+                               chart_format=self.chart_format, log_bins=self.log_bins,
+                               export_format=self.export_format, compression=self.compression,
+                               partition_by=self.partition_by, customer_index=self.customer_index,
+                               table_columns=self.table_columns)
+
+    def _backend_stages(self, stages):
+        # The backend scans the input itself, so nothing is loaded or cleaned in pandas.
+        if "clean" in stages:
+            print(f"⚠️ The {self.backend} backend expects a cleaned input; skipping the clean stage.")
+        if self.save_model_path:
+            raise ValueError(f"--save-model is not supported with the {self.backend} backend!")
+        if not {"features", "score", "flag"} <= set(stages):
+            raise ValueError(f"The {self.backend} backend runs features, score and flag together!")
+        return ["backend"]
+
+    def _run_backend(self):
+        from src.ComputeBackend.compute_backend import get_backend
+        from src.RiskScore.risk_model import RiskModel
+        options = {"memory_limit": self.memory_limit} if self.memory_limit else {}
+        backend = get_backend(self.backend, model=RiskModel.load(self.model_path) if self.model_path else None,
+                              **options)
+        if "report" in self.stages:
+            backend.write_reports(self.input_path, self._reports())
+        else:
+            self.data = backend.run(self.input_path)
+
+    def _run_load(self):
+        self.dataManager = self._data_manager()
+        self.data = self.dataManager.load_data(self.input_path)
+
+    def _run_clean(self):
+        self.data = self.dataManager.clean_data(self.data)
+
+    def _run_features(self):
+        from src.FeatureBuilder.feature_builder import FeatureBuilder
+        self.data = FeatureBuilder().built_feature(self.data)
+
+    def _model(self):
+        """The saved model to score with, or a model fitted (and optionally saved) on this run's data."""
+        from src.RiskScore.risk_score import RiskScorer
+        from src.RiskScore.risk_model import RiskModel
+        if self.model_path:
+            return RiskModel.load(self.model_path)
+        if self.save_model_path:
+            model = RiskScorer().fit(self.data)
+            print(f"Saved risk model to {model.save(self.save_model_path)}")
+            return model
+        return None
+
+    def _run_score(self):
+        from src.RiskScore.risk_score import RiskScorer
+        self.data = RiskScorer().compute_scores(self.data, keep_zscores=self._keep_zscores("score"),
+                                                model=self._model())
+
+    def _run_flag(self):
+        from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+        self.data = TransactionFlagger().is_suspicious(self.data)
+
+    def _run_parallel(self):
+        from src.ParallelPipeline.parallel_pipeline import ParallelPipeline
+        # Features are built inside the pool, so a model can only be fitted here if one is loaded.
+        model = self._model() if self.model_path else None
+        self.data = ParallelPipeline(workers=self.workers, keep_zscores=self._keep_zscores("parallel"),
+                                     model=model).run(self.data)
+        if self.save_model_path and not self.model_path:
+            self._model()
+
+    def _run_report(self):
+        self._reports().generate_reports(self.data)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Bank transaction risk pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run pipeline stages headless.")
+    run.add_argument("--input", required=True, help="Transaction CSV file.")
+    run.add_argument("--output-dir", default="Reports", help="Folder for exported reports.")
+    run.add_argument("--stages", default="all",
+                     help=f"Comma-separated stages to run ({','.join(STAGES)}) or 'all'.")
+    run.add_argument("--workers", type=int, default=1, help="Processes for features/score/flag.")
+    run.add_argument("--no-cache", action="store_true", help="Neither read nor write the dataset cache.")
+    run.add_argument("--dedup-key", default=None,
+                     help="Comma-separated columns identifying a transaction (default: every required column).")
+    run.add_argument("--quarantine-dir", default="quarantine", help="Folder for rows rejected while cleaning.")
+    run.add_argument("--all-columns", action="store_true",
+                     help="Read every CSV column and keep every intermediate column, instead of only those the stages need.")
+    run.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas",
+                     help="Engine for features/score/flag/report; duckdb needs a cleaned input and spills to disk.")
+    run.add_argument("--memory-limit", default=None, help="Memory limit of the duckdb backend, e.g. 4GB.")
+    run.add_argument("--no-zscores", action="store_true", help="Do not keep the per-feature z-score columns.")
+    run.add_argument("--chart-dpi", type=int, default=300, help="Resolution of raster PDF charts.")
+    run.add_argument("--chart-format", choices=["png", "svg"], default="png",
+                     help="Raster (png) or vector (svg, needs svglib) PDF charts.")
+    run.add_argument("--log-bins", action="store_true", help="Log-spaced bins for the amount histogram.")
+    run.add_argument("--export-format", choices=["csv", "parquet"], default="csv",
+                     help="Format of the flagged-transaction and customer-summary tables.")
+    run.add_argument("--compression", choices=["gzip", "zstd"], default=None,
+                     help="Compress the exported tables (zstd needs the zstandard package).")
+    run.add_argument("--partition-by", default=None,
+                     help="Comma-separated columns to partition Parquet output by, e.g. day,risk_band.")
+    run.add_argument("--no-customer-index", action="store_true",
+                     help="Do not build the per-customer lookup index with the reports.")
+    run.add_argument("--model", default=None, help="Score with this saved risk model instead of fitting on the input.")
+    run.add_argument("--save-model", default=None, help="Save the risk model fitted on the input to this JSON file.")
+    run.add_argument("--profile-json", default=None, help="Write the per-stage profile to this JSON file.")
+    run.add_argument("--chrome-trace", default=None,
+                     help="Write the stages as a Chrome trace (chrome://tracing, ui.perfetto.dev).")
+    run.add_argument("--trace-memory", action="store_true", help="Record each stage's tracemalloc peak (slower).")
+    run.add_argument("--profile-stage", action="append", default=[], choices=STAGES + ["parallel"],
+                     help="Capture a cProfile/pyinstrument profile of this stage; repeatable.")
+    run.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile",
+                     help="Profiler for --profile-stage.")
+    run.add_argument("--profile-dir", default="profiles", help="Folder for --profile-stage captures.")
+
+    serve = commands.add_parser("serve", help="Score transactions as they arrive, as JSON lines.")
+    serve.add_argument("--history", required=True,
+                       help="Transaction CSV that seeds customer state and the frozen score statistics.")
+    serve.add_argument("--port", type=int, default=None,
+                       help="Listen on this local TCP port instead of reading stdin.")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on with --port.")
+    serve.add_argument("--model", default=None, help="Saved risk model; by default one is fitted on --history.")
+    serve.add_argument("--no-cache", action="store_true", help="Neither read nor write the dataset cache.")
+
+    lookup = commands.add_parser("lookup", help="Show one customer's transactions and risk profile from the index.")
+    lookup.add_argument("customer", help="Customer account (nameOrig), e.g. C1231006815.")
+    lookup.add_argument("--index", default="Reports/customer_index", help="Index folder written with the reports.")
+    lookup.add_argument("--columns", default=None, help="Comma-separated columns to show (default: all).")
+    lookup.add_argument("--json", action="store_true", help="Print the profile and transactions as one JSON object.")
+
+    generate = commands.add_parser("generate", help="Write a synthetic PaySim-style transaction CSV.")
+    generate.add_argument("--rows", type=int, required=True, help="Number of transactions.")
+    generate.add_argument("--output", default="data/test_data.csv", help="CSV file to write.")
+    generate.add_argument("--seed", type=int, default=0, help="Same seed, same data.")
+    generate.add_argument("--customers", type=int, default=None, help="Number of customers (default rows / 5).")
+    generate.add_argument("--skew", type=float, default=1.0,
+                          help="Customer skew: 0 is uniform, higher gives a few very busy accounts.")
+    generate.add_argument("--fraud-rate", type=float, default=0.0013, help="Share of transactions labelled fraud.")
+    return parser
+
+
+def generate(args):
+    from src.DataGenerator.data_generator import DataGenerator
+
+    start = time.perf_counter()
+    DataGenerator(seed=args.seed, n_customers=args.customers, skew=args.skew,
+                  fraud_rate=args.fraud_rate).write_csv(args.output, args.rows)
+    print(f"Wrote {args.rows:,} transactions to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+def lookup(args):
+    from src.CustomerIndex.customer_index import CustomerIndex
+
+    index = CustomerIndex.open(args.index)
+    start = time.perf_counter()
+    profile = index.profile(args.customer)
+    if profile is None:
+        raise ValueError(f"Customer '{args.customer}' is not in the index!")
+    history = index.history(args.customer, [col.strip() for col in args.columns.split(",")] if args.columns else None)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps({"profile": profile, "transactions": json.loads(history.to_json(orient="records"))}))
+        return
+    print(json.dumps(profile, indent=2))
+    print(history.to_string(index=False))
+    print(f"Looked up {len(history):,} transactions in {elapsed_ms:.3f} ms", file=sys.stderr)
+
+
+def serve(args):
+    from src.DataManager.data_manger import DataManagerc
+    from src.StreamScorer.stream_scorer import StreamScorer
+    from src.RiskScore.risk_model import RiskModel
+
+    dataManager = DataManagerc(use_cache=not args.no_cache)
+    history = dataManager.clean_data(dataManager.load_data(args.history))
+    scorer = StreamScorer.from_history(history, model=RiskModel.load(args.model) if args.model else None)
+    print(f"Seeded state with {len(history):,} transactions from {len(scorer.state):,} customers",
+          file=sys.stderr, flush=True)
+    try:
+        if args.port is None:
+            scorer.serve_stdin()
+        else:
+            scorer.serve_socket(args.host, args.port)
+    finally:
+        print(f"Latency: {json.dumps(scorer.latency.summary())}", file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            serve(args)
+            return 0
+        if args.command == "generate":
+            generate(args)
+            return 0
+        if args.command == "lookup":
+            lookup(args)
+            return 0
+
+        runner = BatchRunner(
+            input_path=args.input,
+            output_dir=args.output_dir,
+            stages=[stage.strip() for stage in args.stages.split(",") if stage.strip()],
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            keep_zscores=not args.no_zscores,
+            chart_dpi=args.chart_dpi,
+            chart_format=args.chart_format,
+            log_bins=args.log_bins,
+            export_format=args.export_format,
+            compression=args.compression,
+            partition_by=[col.strip() for col in args.partition_by.split(",")] if args.partition_by else None,
+            model_path=args.model,
+            save_model_path=args.save_model,
+            dedup_key=[col.strip() for col in args.dedup_key.split(",")] if args.dedup_key else None,
+            quarantine_dir=args.quarantine_dir,
+            project_columns=not args.all_columns,
+            backend=args.backend,
+            memory_limit=args.memory_limit,
+            customer_index=not args.no_customer_index,
+            profiler=StageProfiler(trace_memory=args.trace_memory, profile_stages=args.profile_stage,
+                                   profiler=args.profiler, output_dir=args.profile_dir),
+        )
+        try:
+            runner.run()
+        finally:
+            # Written even when a stage fails, so the profile shows where the run stopped.
+            if args.profile_json:
+                print(f"Stage profile written to {runner.profiler.save_json(args.profile_json)}")
+            if args.chrome_trace:
+                print(f"Chrome trace written to {runner.profiler.save_chrome_trace(args.chrome_trace)}")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1 @@
+from src.Checkpoint import checkpoint_store
\ No newline at end of file
@@ -0,0 +1,170 @@
+import os
+import glob
+import json
+import hashlib
+import time
+from functools import lru_cache
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Packages whose code decides what a stage outputs; editing any of them invalidates every checkpoint.
+CODE_DIRS = ("src", "model", "constant")
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Hash of the project's Python sources, computed once per process."""
+    digest = hashlib.sha256()
+    for code_dir in CODE_DIRS:
+        for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, code_dir, "**", "*.py"), recursive=True)):
+            digest.update(os.path.relpath(path, PROJECT_ROOT).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def source_key(path_file):
+    """Key of a source file by its path, size and modification time, like the dataset cache."""
+    stat = os.stat(path_file)
+    identity = f"{os.path.abspath(path_file)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+class CheckpointStore:
+    """Stage outputs saved as Feather files, addressed by the lineage that produced them.
+
+    A checkpoint's key hashes the key of its input, the stage name and parameters and the
+    code version, and the chain starts at the source file's key, so a key names one exact
+    output. Next to each `<key>.feather` a `<key>.json` manifest records the stage, the
+    source and the lineage. A restore marks the entry as used; once the store holds more
+    than `max_entries` checkpoints or `max_bytes`, the least recently used are removed.
+    """
+
+    def __init__(self, directory=".checkpoints", max_bytes=2 * 2 ** 30, max_entries=16, enabled=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled and feather is not None
+
+    def key(self, parent_key, stage, params=None):
+        payload = json.dumps([parent_key, stage, params or {}, code_version()], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def load(self, key):
+        """The checkpointed frame for `key`, or None if there is none."""
+        if not self.enabled:
+            return None
+        data_path, manifest = self._data_path(key), self._manifest(key)
+        if manifest is None or not os.path.exists(data_path):
+            return None
+        data = feather.read_table(data_path, memory_map=True).to_pandas()
+        data.attrs.update(manifest.get("attrs", {}))
+        now = time.time()
+        os.utime(data_path, (now, now))
+        return data
+
+    def save(self, key, data, stage, parent_key=None, source=None, lineage=()):
+        """Checkpoint `data` under `key` and return the manifest written next to it."""
+        if not self.enabled or data is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        data_path = self._data_path(key)
+        # Uncompressed so a restore can memory-map the file directly.
+        tmp_path = f"{data_path}.tmp-{os.getpid()}"
+        feather.write_feather(data, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, data_path)
+
+        manifest = {
+            "key": key,
+            "parent_key": parent_key,
+            "stage": stage,
+            "lineage": list(lineage),
+            "source": None if source is None else os.path.abspath(source),
+            "source_key": None if source is None else source_key(source),
+            "code_version": code_version(),
+            "rows": len(data),
+            "bytes": os.path.getsize(data_path),
+            "created": time.time(),
+            "attrs": {k: v for k, v in data.attrs.items() if isinstance(v, (str, int, float, bool))},
+        }
+        # The manifest goes last: a checkpoint without one is never loaded.
+        manifest_path = self._manifest_path(key)
+        tmp_path = f"{manifest_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+        self.evict(keep=key)
+        return manifest
+
+    def is_valid(self, manifest):
+        """Whether a checkpoint still matches this code and an unchanged source file."""
+        if manifest.get("code_version") != code_version():
+            return False
+        source = manifest.get("source")
+        if source is None or not os.path.exists(source) or source_key(source) != manifest.get("source_key"):
+            return False
+        return os.path.exists(self._data_path(manifest["key"]))
+
+    def latest(self):
+        """Manifest of the most recently written valid checkpoint, or None."""
+        valid = [manifest for manifest in self.manifests() if self.is_valid(manifest)]
+        return max(valid, key=lambda manifest: manifest["created"], default=None)
+
+    def manifests(self):
+        manifests = []
+        for manifest_path in glob.glob(os.path.join(self.directory, "*.json")):
+            manifest = self._manifest(os.path.splitext(os.path.basename(manifest_path))[0])
+            if manifest is not None:
+                manifests.append(manifest)
+        return manifests
+
+    def evict(self, keep=None):
+        """Remove least recently used checkpoints beyond the size and count limits; return how many."""
+        entries = []
+        for data_path in glob.glob(os.path.join(self.directory, "*.feather")):
+            key = os.path.splitext(os.path.basename(data_path))[0]
+            stat = os.stat(data_path)
+            entries.append((stat.st_mtime, stat.st_size, key))
+        entries.sort(reverse=True)
+
+        kept, total, removed = 0, 0, 0
+        for _, size, key in entries:
+            if key != keep and (kept >= self.max_entries or total + size > self.max_bytes):
+                self._remove(key)
+                removed += 1
+                continue
+            kept += 1
+            total += size
+        return removed
+
+    def clear(self):
+        """Delete every checkpoint and return how many were removed."""
+        keys = {os.path.splitext(os.path.basename(path))[0]
+                for path in glob.glob(os.path.join(self.directory, "*.feather"))}
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        for path in (self._data_path(key), self._manifest_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _manifest(self, key):
+        try:
+            with open(self._manifest_path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _data_path(self, key):
+        return os.path.join(self.directory, f"{key}.feather")
+
+    def _manifest_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
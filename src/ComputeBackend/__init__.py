@@ -0,0 +1 @@
+from src.ComputeBackend import compute_backend
\ No newline at end of file
@@ -0,0 +1,70 @@
+import importlib
+import pandas as pd
+from src.DataManager.schema import read_dtypes, apply_schema
+from src.FeatureBuilder.feature_builder import FeatureBuilder
+from src.RiskScore.risk_score import RiskScorer
+from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+from src.GenerateReports.generate_reports import GenerateReports
+from model.reports.report_metrics import ReportMetrics
+
+
+# Backend name -> (module, class); modules are imported on first use, so an optional
+# engine is only needed when its backend is picked.
+BACKENDS = {
+    "pandas": ("src.ComputeBackend.compute_backend", "PandasBackend"),
+    "duckdb": ("src.ComputeBackend.duckdb_backend", "DuckDBBackend"),
+}
+
+
+def get_backend(name="pandas", **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    module_name, class_name = BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)(**kwargs)
+
+
+class PandasBackend:
+    """Features -> scores -> flags -> report inputs with the eager pandas stages; the reference backend.
+
+    Every backend takes a cleaned source, either a frame or a CSV/Parquet path, and offers
+    the same three calls: `run` returns the scored transactions, `report` returns the
+    `ReportMetrics` and export tables the reports are written from, and `write_reports`
+    writes them. Other backends must give the same results, which
+    `src.ComputeBackend.conformance` checks.
+    """
+
+    name = "pandas"
+
+    def __init__(self, model=None):
+        # A fitted RiskModel to score with; None fits one on the source.
+        self.model = model
+
+    @staticmethod
+    def read(source):
+        if isinstance(source, pd.DataFrame):
+            return source.copy()
+        if str(source).endswith(".parquet"):
+            return apply_schema(pd.read_parquet(source))
+        return apply_schema(pd.read_csv(source, dtype=read_dtypes()))
+
+    def run(self, source):
+        data = self.read(source)
+        if data.empty:
+            raise ValueError("Dataframe is empty or None!")
+        data = FeatureBuilder().built_feature(data)
+        data = RiskScorer().compute_scores(data, keep_zscores=False, model=self.model)
+        return TransactionFlagger().is_suspicious(data)
+
+    def report(self, source, bins=30, log_bins=False, top_k=10):
+        data = self.run(source)
+        metrics = ReportMetrics.from_data(data, bins=bins, log_bins=log_bins, top_k=top_k)
+        return metrics, {
+            "flagged_transactions": metrics.flagged(data),
+            "customer_risk_summary": GenerateReports.customer_summary(data),
+        }
+
+    def write_reports(self, source, reports):
+        """Write every report for `source` with a GenerateReports instance."""
+        metrics, tables = self.report(source, bins=reports.histogram_bins, log_bins=reports.log_bins)
+        reports.write_reports(metrics, tables)
+        return metrics
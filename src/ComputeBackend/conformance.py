@@ -0,0 +1,141 @@
+"""Check a compute backend against the pandas reference on generated and edge-case data.
+
+Run from the project root:  python -m src.ComputeBackend.conformance --backend duckdb --rows 200000
+"""
+import os
+import sys
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from src.ComputeBackend.compute_backend import PandasBackend, get_backend, BACKENDS
+from src.DataGenerator.data_generator import DataGenerator
+from src.RiskScore.risk_score import RiskScorer
+
+RTOL = 1e-9
+ATOL = 1e-9
+
+
+def edge_cases():
+    """A few rows the generated data rarely has: a burst in one step, single-transaction
+    accounts, self transfers, zero amounts and a customer only ever on the receiving side."""
+    rows = [
+        (1, "TRANSFER", 100.0, "C_burst", 500.0, 400.0, "C_sink", 0.0, 100.0),
+        (1, "TRANSFER", 100.0, "C_burst", 400.0, 300.0, "C_sink", 100.0, 200.0),
+        (1, "CASH_OUT", 0.0, "C_burst", 300.0, 300.0, "M_shop", 0.0, 0.0),
+        (2, "PAYMENT", 12.5, "C_once", 12.5, 0.0, "C_burst", 0.0, 12.5),
+        (3, "TRANSFER", 7.25, "C_self", 10.0, 2.75, "C_self", 2.75, 10.0),
+        (170, "CASH_IN", 55.5, "C_burst", 300.0, 355.5, "M_bank", 900.0, 844.5),
+        (743, "DEBIT", 1e7, "C_whale", 2e7, 1e7, "C_sink", 200.0, 1e7 + 200.0),
+    ]
+    columns = ["step", "type", "amount", "nameOrig", "oldbalanceOrg", "newbalanceOrig",
+               "nameDest", "oldbalanceDest", "newbalanceDest"]
+    data = pd.DataFrame(rows, columns=columns)
+    data["isFraud"] = 0
+    data["isFlaggedFraud"] = 0
+    return data
+
+
+def compare_frames(expected, actual, thresholds):
+    problems = []
+    if list(expected.columns) != list(actual.columns):
+        problems.append(f"columns differ: {list(expected.columns)} != {list(actual.columns)}")
+        return problems
+    if len(expected) != len(actual):
+        problems.append(f"row count {len(actual)} != {len(expected)}")
+        return problems
+
+    # A score within the tolerance of a band threshold may fall on either side of it.
+    scores = expected["final_risk_score"].to_numpy(dtype=np.float64)
+    on_edge = np.zeros(len(expected), dtype=bool)
+    for threshold in thresholds:
+        on_edge |= np.abs(scores - threshold) <= ATOL + RTOL * abs(threshold)
+
+    for col in expected.columns:
+        left, right = expected[col], actual[col]
+        if col in ("risk_band", "is_suspicious"):
+            differs = (left.astype(str).to_numpy() != right.astype(str).to_numpy()) & ~on_edge
+        elif pd.api.types.is_numeric_dtype(left) and not pd.api.types.is_bool_dtype(left):
+            differs = ~np.isclose(left.to_numpy(dtype=np.float64), right.to_numpy(dtype=np.float64),
+                                  rtol=RTOL, atol=ATOL, equal_nan=True)
+        else:
+            differs = left.astype(object).where(left.notna(), None).to_numpy() \
+                != right.astype(object).where(right.notna(), None).to_numpy()
+        if differs.any():
+            row = int(np.flatnonzero(differs)[0])
+            problems.append(f"{col}: {int(differs.sum())} rows differ, first at row {row}: "
+                            f"{left.iloc[row]!r} != {right.iloc[row]!r}")
+    return problems
+
+
+def compare_metrics(expected, actual):
+    problems = []
+    for name in ("total", "flagged_count"):
+        if getattr(expected, name) != getattr(actual, name):
+            problems.append(f"{name}: {getattr(actual, name)} != {getattr(expected, name)}")
+    for name in ("mean_score", "max_score"):
+        if not np.isclose(getattr(expected, name), getattr(actual, name), rtol=RTOL, atol=ATOL, equal_nan=True):
+            problems.append(f"{name}: {getattr(actual, name)} != {getattr(expected, name)}")
+    if not np.allclose(expected.amount_edges, actual.amount_edges, rtol=RTOL, atol=ATOL):
+        problems.append("amount_edges differ")
+    for name in ("normal_amount_counts", "flagged_amount_counts"):
+        if not np.array_equal(getattr(expected, name), getattr(actual, name)):
+            problems.append(f"{name} differ")
+    if expected.band_counts.astype(str).to_dict() != actual.band_counts.astype(str).to_dict():
+        problems.append(f"band_counts: {actual.band_counts.to_dict()} != {expected.band_counts.to_dict()}")
+    if expected.top_flagged_customers.to_dict() != actual.top_flagged_customers.to_dict():
+        problems.append("top_flagged_customers differ")
+    if not np.allclose(expected.top_risky["final_risk_score"].to_numpy(dtype=np.float64),
+                       actual.top_risky["final_risk_score"].to_numpy(dtype=np.float64), rtol=RTOL, atol=ATOL):
+        problems.append("top_risky scores differ")
+    return problems
+
+
+def check_backend(backend, source, reference=None):
+    """Every difference between `backend` and the reference on `source`; empty when they agree."""
+    reference = PandasBackend() if reference is None else reference
+    thresholds = RiskScorer().band_thresholds
+    problems = compare_frames(reference.run(source), backend.run(source), thresholds)
+
+    expected_metrics, expected_tables = reference.report(source)
+    metrics, tables = backend.report(source)
+    problems += compare_metrics(expected_metrics, metrics)
+    for name, expected in expected_tables.items():
+        actual = tables[name]
+        if name == "flagged_transactions":
+            problems += [f"{name}: {p}" for p in compare_frames(
+                expected.reset_index(drop=True), actual.reset_index(drop=True), thresholds)]
+        else:
+            # One row per customer; the order follows the reference's category order, not a contract.
+            expected, actual = (table.astype({"nameOrig": str}).sort_values("nameOrig", ignore_index=True)
+                                for table in (expected, actual))
+            problems += [f"{name}: {p}" for p in compare_frames(expected, actual, thresholds)]
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="duckdb", choices=list(BACKENDS))
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backend = get_backend(args.backend)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        generated = os.path.join(tmp, "generated.csv")
+        DataGenerator(seed=args.seed).write_csv(generated, args.rows)
+        edges = os.path.join(tmp, "edge_cases.csv")
+        edge_cases().to_csv(edges, index=False)
+
+        for label, source in (("generated", generated), ("edge cases", edges)):
+            problems = check_backend(backend, source)
+            failed |= bool(problems)
+            print(f"{'❌' if problems else '✅'} {args.backend} vs pandas on {label}")
+            for problem in problems:
+                print(f"   - {problem}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
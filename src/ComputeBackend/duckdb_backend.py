@@ -0,0 +1,377 @@
+import time
+import numpy as np
+import pandas as pd
+from src.DataManager.schema import TRANSACTION_SCHEMA, REQUIRED_COLUMNS, FLOAT_TOLERANCE, apply_schema
+from src.FeatureBuilder.feature_builder import FeatureBuilder, VELOCITY_WINDOWS
+from src.RiskScore.risk_score import RiskScorer
+from src.RiskScore.risk_model import RiskModel
+from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+from model.reports.report_metrics import ReportMetrics
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+# Categorical columns travel through SQL as text, whatever the source stored them as.
+TEXT_COLUMNS = ["type", "nameOrig", "nameDest"]
+
+
+def per_account(side, expression):
+    # Rows without an account get NULL, as the pandas stages leave them NaN; accounts
+    # without a matching edge count 0.
+    return f"CASE WHEN tx.{side} IS NOT NULL THEN coalesce({expression}, 0) END"
+
+
+def feature_expressions(windows=VELOCITY_WINDOWS):
+    """SQL per FeatureBuilder column, over `tx` joined to the per-account tables of FEATURE_SQL."""
+    expressions = {
+        "day": "ceil(tx.step / 24)::INTEGER",
+        "count_transaction": "acct.count_transaction",
+        "total_amount": "acct.total_amount",
+        "avg_amount": "acct.avg_amount",
+        "max_amount": "acct.max_amount",
+        "std_amount": "acct.std_amount",
+        "z_score": "(tx.amount - acct.avg_amount) / nullif(acct.std_amount, 0)",
+        "daily_velocity_count": "daily.daily_velocity_count",
+        "errorBalanceOrig": "tx.newbalanceOrig + tx.amount - tx.oldbalanceOrg",
+    }
+    for label in windows:
+        for kind in ("count", "amount"):
+            expressions[f"velocity_{kind}_{label}"] = per_account("nameOrig", f"velocity.velocity_{kind}_{label}")
+    expressions.update({
+        "orig_in_degree": per_account("nameOrig", "orig_in.n"),
+        "orig_unique_counterparties": per_account("nameOrig", "counterparties.n"),
+        "dest_in_degree": per_account("nameDest", "dest_in.n"),
+        "dest_out_degree": per_account("nameDest", "dest_out.n"),
+        "dest_fan_in_2hop": per_account("nameDest", "fan_in.n"),
+        "errorBalanceDest": "tx.oldbalanceDest + tx.amount - tx.newbalanceDest",
+    })
+    return expressions
+
+
+def velocity_sql(windows=VELOCITY_WINDOWS):
+    # RANGE frames include every row of the current step, like window_velocity's runs.
+    columns = ["rid"]
+    for label, hours in windows.items():
+        frame = f"(PARTITION BY nameOrig ORDER BY step RANGE BETWEEN {hours - 1} PRECEDING AND CURRENT ROW)"
+        columns.append(f"count(*) OVER {frame} AS velocity_count_{label}")
+        # Missing amounts add nothing, as in window_velocity.
+        columns.append(f"coalesce(sum(amount::DOUBLE) OVER {frame}, 0) AS velocity_amount_{label}")
+    return f"SELECT {', '.join(columns)} FROM tx"
+
+
+FEATURE_SQL = """
+WITH acct AS (
+    SELECT nameOrig, count(*) AS count_transaction, sum(amount::DOUBLE) AS total_amount,
+           avg(amount::DOUBLE) AS avg_amount, max(amount)::DOUBLE AS max_amount,
+           stddev_samp(amount::DOUBLE) AS std_amount
+    FROM tx GROUP BY nameOrig
+),
+daily AS (
+    SELECT nameOrig, ceil(step / 24)::INTEGER AS day, count(*) AS daily_velocity_count
+    FROM tx GROUP BY ALL
+),
+velocity AS ({velocity}),
+edges AS (
+    SELECT nameOrig AS sender, nameDest AS receiver FROM tx
+    WHERE nameOrig IS NOT NULL AND nameDest IS NOT NULL
+),
+in_degree AS (SELECT receiver AS account, count(*) AS n FROM edges GROUP BY 1),
+out_degree AS (SELECT sender AS account, count(*) AS n FROM edges GROUP BY 1),
+pairs AS (SELECT DISTINCT sender, receiver FROM edges),
+counterparties AS (
+    SELECT account, count(DISTINCT other) AS n FROM (
+        SELECT sender AS account, receiver AS other FROM pairs
+        UNION ALL SELECT receiver, sender FROM pairs
+    ) GROUP BY 1
+),
+fan_in AS (
+    SELECT pairs.receiver AS account, sum(coalesce(in_degree.n, 0))::BIGINT AS n
+    FROM pairs LEFT JOIN in_degree ON in_degree.account = pairs.sender GROUP BY 1
+)
+SELECT tx.*, {features}
+FROM tx
+LEFT JOIN acct USING (nameOrig)
+LEFT JOIN daily ON daily.nameOrig = tx.nameOrig AND daily.day = ceil(tx.step / 24)::INTEGER
+LEFT JOIN velocity USING (rid)
+LEFT JOIN in_degree AS orig_in ON orig_in.account = tx.nameOrig
+LEFT JOIN counterparties ON counterparties.account = tx.nameOrig
+LEFT JOIN in_degree AS dest_in ON dest_in.account = tx.nameDest
+LEFT JOIN out_degree AS dest_out ON dest_out.account = tx.nameDest
+LEFT JOIN fan_in ON fan_in.account = tx.nameDest
+"""
+
+
+class DuckDBBackend:
+    """The pandas stages as SQL plans in an embedded DuckDB, for data larger than memory.
+
+    The source is scanned once into a DuckDB table; features are one query of per-account
+    aggregates, window functions and degree joins, and scores, bands and flags a second one
+    on top of it, both run on every core. DuckDB spills to `temp_directory` when a table or
+    a sort outgrows `memory_limit`, and `report` fetches only aggregates, the flagged rows
+    and the customer summary, so the scored transactions never have to fit in pandas.
+
+    Fitting a model needs the feature means/stds before anything can be scored, so without
+    a `model` the features are stored first and aggregated; with one they are scored as
+    they are computed. The normal CDF has no SQL function, so scores come from
+    `RiskScorer.score_matrix` as a vectorized Arrow UDF over each batch of rows. The UDF is
+    Python and holds the GIL, so that step runs one batch at a time whatever `threads` is;
+    `timings` has the seconds of each step of the last run, the UDF's own share included.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, model=None, threads=None, memory_limit=None, temp_directory=None):
+        if duckdb is None:
+            raise ValueError("duckdb is not installed: pip install duckdb")
+        self.model = model
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.temp_directory = temp_directory
+        self.scorer = RiskScorer()
+        self.timings = {}
+
+    def connect(self):
+        con = duckdb.connect()
+        con.execute("SET enable_progress_bar = false")
+        if self.threads:
+            con.execute(f"SET threads = {int(self.threads)}")
+        if self.memory_limit:
+            con.execute("SET memory_limit = ?", [str(self.memory_limit)])
+        if self.temp_directory:
+            con.execute("SET temp_directory = ?", [str(self.temp_directory)])
+        return con
+
+    def run(self, source):
+        con = self.connect()
+        try:
+            self._score(con, source)
+            return self._to_pandas(con.sql("SELECT * EXCLUDE (rid) FROM scored ORDER BY rid").df())
+        finally:
+            con.close()
+
+    def report(self, source, bins=30, log_bins=False, top_k=10):
+        con = self.connect()
+        try:
+            self._score(con, source)
+            metrics = self._metrics(con, bins, log_bins, top_k)
+            flagged = con.sql("SELECT * EXCLUDE (rid) FROM scored WHERE is_suspicious ORDER BY rid").df()
+            summary = con.sql("""
+                SELECT nameOrig, max(final_risk_score) AS final_risk_score, arg_max(risk_band, rid) AS risk_band
+                FROM scored WHERE nameOrig IS NOT NULL GROUP BY nameOrig ORDER BY nameOrig
+            """).df()
+            summary["risk_band"] = self._bands(summary["risk_band"])
+            return metrics, {
+                "flagged_transactions": self._to_pandas(flagged),
+                "customer_risk_summary": summary,
+            }
+        finally:
+            con.close()
+
+    def write_reports(self, source, reports):
+        """Write every report for `source` with a GenerateReports instance."""
+        metrics, tables = self.report(source, bins=reports.histogram_bins, log_bins=reports.log_bins)
+        reports.write_reports(metrics, tables)
+        return metrics
+
+    def _read(self, con, source):
+        """Scan `source` into the table `tx`, numbering rows in source order as `rid`."""
+        if isinstance(source, pd.DataFrame):
+            con.register("source_frame", source)
+            relation, params = "source_frame", []
+        elif str(source).endswith(".parquet"):
+            relation, params = "read_parquet(?)", [str(source)]
+        else:
+            relation, params = "read_csv(?, header = true)", [str(source)]
+
+        columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {relation}", params).fetchall()]
+        missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}!")
+
+        replaced = ", ".join(f"{col}::VARCHAR AS {col}" for col in TEXT_COLUMNS)
+        con.execute(f"""
+            CREATE TEMP TABLE tx AS
+            SELECT row_number() OVER () - 1 AS rid, * REPLACE ({replaced})
+            FROM {relation}
+        """, params)
+        if con.sql("SELECT count(*) FROM tx").fetchone()[0] == 0:
+            raise ValueError("Dataframe is empty or None!")
+
+        # The schema stores a float column as float32 when every value survives the round
+        # trip (apply_schema); the features are computed on the same values here.
+        floats = [col for col, dtype in TRANSACTION_SCHEMA.items() if dtype == "float32" and col in columns]
+        checks = ", ".join(f"max(abs({col}::FLOAT::DOUBLE - {col}::DOUBLE)) FILTER (WHERE NOT isnan({col}))"
+                           for col in floats)
+        errors = con.sql(f"SELECT {checks} FROM tx").fetchone()
+        for col, error in zip(floats, errors):
+            if error is None or error <= FLOAT_TOLERANCE:
+                con.execute(f"ALTER TABLE tx ALTER COLUMN {col} TYPE FLOAT")
+
+    def _score(self, con, source):
+        """Build the table `scored`: the transactions with every feature, score, band and flag."""
+        self.timings = {}
+        start = time.perf_counter()
+        self._read(con, source)
+        self.timings["read"] = time.perf_counter() - start
+        builder = FeatureBuilder()
+        expressions = feature_expressions(builder.velocity_windows)
+        features = ", ".join(f"{expressions[col]} AS {col}" for col in builder.produced_columns())
+        query = FEATURE_SQL.format(velocity=velocity_sql(builder.velocity_windows), features=features)
+
+        model = self.model
+        if model is None:
+            start = time.perf_counter()
+            con.execute(f"CREATE TEMP TABLE featured AS {query}")
+            self.timings["features"] = time.perf_counter() - start
+            start = time.perf_counter()
+            model = self._fit(con)
+            self.timings["fit"] = time.perf_counter() - start
+            query = "SELECT * FROM featured"
+
+        self._register_scorer(con, model)
+        score = f"risk_score([{', '.join(f'{col}::DOUBLE' for col in model.features)}])"
+        bands = " ".join(f"WHEN final_risk_score < {float(upper)!r} THEN '{label}'"
+                         for label, upper in zip(self.scorer.BAND_LABELS, model.band_thresholds))
+        suspicious = ", ".join(f"'{band}'" for band in TransactionFlagger.SUSPICIOUS_BANDS)
+        # With a model the features are computed inside this query, and their time counts here.
+        start = time.perf_counter()
+        con.execute(f"""
+            CREATE TEMP TABLE scored AS
+            WITH scores AS (
+                SELECT *, CASE WHEN isnan(raw_score) THEN NULL ELSE raw_score END AS final_risk_score
+                FROM (SELECT *, {score} AS raw_score FROM ({query}))
+            ),
+            banded AS (
+                -- NULL/NaN scores compare false everywhere and land in the last band, like assign_bands.
+                SELECT * EXCLUDE (raw_score),
+                       CASE {bands} ELSE '{self.scorer.BAND_LABELS[-1]}' END AS risk_band
+                FROM scores
+            )
+            SELECT *, risk_band IN ({suspicious}) AS is_suspicious FROM banded
+        """)
+        self.timings["score"] = time.perf_counter() - start
+        con.execute("DROP TABLE IF EXISTS featured")
+
+    def _fit(self, con):
+        stats = ", ".join(f"avg({col}::DOUBLE), stddev_samp({col}::DOUBLE)" for col in self.scorer.features)
+        values = np.array(con.sql(f"SELECT {stats} FROM featured").fetchone(), dtype=np.float64)
+        n_rows = con.sql("SELECT count(*) FROM featured").fetchone()[0]
+        mean, std = values[0::2], values[1::2]
+        return RiskModel(self.scorer.features, mean, std, self.scorer.band_thresholds, n_rows=n_rows)
+
+    def _register_scorer(self, con, model):
+        import pyarrow as pa
+
+        scorer, width, timings = self.scorer, len(model.features), self.timings
+        timings["score_udf"] = 0.0
+
+        def risk_score(rows):
+            start = time.perf_counter()
+            if isinstance(rows, pa.ChunkedArray):
+                rows = rows.combine_chunks()
+            matrix = rows.flatten().to_numpy(zero_copy_only=False).astype(np.float64).reshape(len(rows), width)
+            scores = pa.array(scorer.score_matrix(matrix, model.mean, model.std))
+            # Summed over every batch; with the GIL held the calls barely overlap, so this is close to wall time.
+            timings["score_udf"] += time.perf_counter() - start
+            return scores
+
+        con.create_function("risk_score", risk_score, ["DOUBLE[]"], "DOUBLE", type="arrow", null_handling="special")
+
+    def _metrics(self, con, bins, log_bins, top_k):
+        total, flagged_count, mean_score, max_score = con.sql("""
+            SELECT count(*), count(*) FILTER (WHERE is_suspicious), avg(final_risk_score), max(final_risk_score)
+            FROM scored
+        """).fetchone()
+
+        band_counts = con.sql("SELECT risk_band, count(*) AS count FROM scored GROUP BY risk_band").df()
+        band_counts["order"] = band_counts["risk_band"].map(self.scorer.BAND_LABELS.index)
+        band_counts = band_counts.sort_values(["count", "order"], ascending=[False, True])
+        band_counts = pd.Series(band_counts["count"].to_numpy(), name="count",
+                                index=pd.CategoricalIndex(band_counts["risk_band"], categories=self.scorer.BAND_LABELS,
+                                                          ordered=True, name="risk_band"))
+
+        edges, normal_counts, flagged_counts = self._amount_histogram(con, bins, log_bins)
+
+        top_risky = con.sql(f"""
+            SELECT rid, {', '.join(ReportMetrics.TOP_COLUMNS)} FROM scored WHERE final_risk_score IS NOT NULL
+            ORDER BY final_risk_score DESC, rid LIMIT {int(top_k)}
+        """).df().set_index("rid")
+        top_risky.index.name = None
+        top_risky["risk_band"] = self._bands(top_risky["risk_band"])
+
+        top_flagged = con.sql(f"""
+            SELECT nameOrig, count(*) AS count FROM scored WHERE is_suspicious AND nameOrig IS NOT NULL
+            GROUP BY nameOrig ORDER BY count DESC, nameOrig LIMIT {int(top_k)}
+        """).df()
+        top_flagged = pd.Series(top_flagged["count"].to_numpy(), name="count",
+                                index=pd.Index(top_flagged["nameOrig"].to_numpy(), name="nameOrig"))
+
+        return ReportMetrics(
+            total=total,
+            flagged_count=flagged_count,
+            band_counts=band_counts,
+            amount_edges=edges,
+            normal_amount_counts=normal_counts,
+            flagged_amount_counts=flagged_counts,
+            top_risky=top_risky,
+            top_flagged_customers=top_flagged,
+            mean_score=float("nan") if mean_score is None else float(mean_score),
+            max_score=float("nan") if max_score is None else float(max_score),
+            log_bins=log_bins,
+        )
+
+    def _amount_histogram(self, con, bins, log_bins):
+        """ReportMetrics.amount_histogram in SQL: the bin of each amount from a guess and one correction step."""
+        low, high, low_positive, high_positive = con.sql("""
+            SELECT min(a), max(a), min(a) FILTER (WHERE a > 0), max(a) FILTER (WHERE a > 0)
+            FROM (SELECT amount::DOUBLE AS a FROM scored WHERE isfinite(amount))
+        """).fetchone()
+        edges = ReportMetrics.amount_edges(low, high, low_positive, high_positive, bins, log_bins)
+        if log_bins:
+            guess = "floor(ln(a / $low) / ln($high / $low) * $bins)"
+            where = "a > 0"
+        else:
+            guess = "floor((a - $low) / ($high - $low) * $bins)"
+            where = "true"
+        counts = con.execute(f"""
+            WITH guessed AS (
+                SELECT a, flag, least(greatest({guess}, 0), $bins - 1)::BIGINT AS g
+                FROM (SELECT amount::DOUBLE AS a, is_suspicious AS flag FROM scored WHERE isfinite(amount))
+                WHERE {where}
+            ),
+            binned AS (
+                -- searchsorted(edges, a, "right") - 1, with the last edge closed like np.histogram.
+                SELECT flag, CASE WHEN a = $edges[$bins + 1] THEN $bins - 1
+                                  ELSE g - (a < $edges[g + 1])::BIGINT + (a >= $edges[g + 2])::BIGINT END AS b
+                FROM guessed
+            )
+            SELECT b, count(*) FILTER (WHERE NOT flag), count(*) FILTER (WHERE flag)
+            FROM binned WHERE b >= 0 AND b < $bins GROUP BY b
+        """, {"edges": [float(edge) for edge in edges], "low": float(edges[0]), "high": float(edges[-1]),
+              "bins": int(bins)}).fetchall()
+
+        normal_counts = np.zeros(bins, dtype=np.int64)
+        flagged_counts = np.zeros(bins, dtype=np.int64)
+        for b, normal, flagged in counts:
+            normal_counts[b], flagged_counts[b] = normal, flagged
+        return edges, normal_counts, flagged_counts
+
+    def _bands(self, values):
+        return pd.Categorical(values, categories=self.scorer.BAND_LABELS, ordered=True)
+
+    def _to_pandas(self, data):
+        """The dtypes the pandas stages produce: compact schema columns, categorical names and bands."""
+        for col in data.columns:
+            # Integer columns with NULLs arrive as nullable Int64; pandas would hold NaN floats.
+            if isinstance(data[col].dtype, pd.api.extensions.ExtensionDtype) and data[col].dtype.kind in "iu":
+                data[col] = data[col].to_numpy(dtype=np.float64, na_value=np.nan) if data[col].hasnans \
+                    else data[col].to_numpy(dtype=np.int64)
+        data = apply_schema(data)
+        if "day" in data.columns:
+            data["day"] = data["day"].astype(np.int32)
+        data["risk_band"] = self._bands(data["risk_band"])
+        data["is_suspicious"] = data["is_suspicious"].astype(bool)
+        return data
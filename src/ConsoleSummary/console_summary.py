@@ -1,3 +1,6 @@
+from model.reports.report_metrics import ReportMetrics
+
+
 class SummaryConsole:
     def __init__(self):
         pass
@@ -11,9 +14,10 @@ class SummaryConsole:
                 print(">>>>>FRAUD ANALYSIS SUMMARY<<<<<")
                 print("=" * 30)
 
-                tot_transaction=len(data)
-                tot_suspicious=data["is_suspicious"].sum()
-                fraud_percentage = (tot_suspicious / tot_transaction) * 100
+                metrics = ReportMetrics.for_data(data)
+                tot_transaction=metrics.total
+                tot_suspicious=metrics.flagged_count
+                fraud_percentage = metrics.flagged_pct
 
                 print(f"Total Transactions: {tot_transaction:,}")
                 print(f"Flagged as Suspicious: {tot_suspicious:,}")
@@ -23,7 +27,7 @@ class SummaryConsole:
                 print(">>>>>Risk Level Distribution<<<<<")
 
 
-                risk_counts = data['risk_band'].value_counts()
+                risk_counts = metrics.band_counts
                 for level, count in risk_counts.items():
                     print(f"   - {level}: {count:,}")
 
@@ -32,7 +36,7 @@ class SummaryConsole:
 
                 print("Top 5 High-Risk Transactions:")
 
-                top_5=data.sort_values(by="final_risk_score" , ascending=False).head(5)
+                top_5=metrics.top_risky.head(5)
 
                 print(top_5[['nameOrig', 'amount', 'final_risk_score', 'risk_band']])
 
@@ -1,26 +1,150 @@
-from src.DataManager.data_manger import DataManagerc
-from src.FeatureBuilder.feature_builder import FeatureBuilder
-from src.RiskScore.risk_score import RiskScorer
-from src.TransactionFlagger.transaction_flagger import TransactionFlagger
-from src.GenerateReports.generate_reports import GenerateReports
-from src.ConsoleSummary.console_summary import SummaryConsole
+import os
+import time
+import importlib
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.prompt import Prompt
 from constant.shape import PROJECT_TITLE, PROJECT_NAME,display_welcome_banner
+from src.StageProfiler.stage_profiler import StageProfiler
+
+
+# Stage objects are created on first use, so pandas, scipy, matplotlib and reportlab
+# are only imported once a menu option needs them.
+LAZY_STAGES = {
+    "dataManager": ("src.DataManager.data_manger", "DataManagerc"),
+    "featureBuild": ("src.FeatureBuilder.feature_builder", "FeatureBuilder"),
+    "riskScore": ("src.RiskScore.risk_score", "RiskScorer"),
+    "flagger": ("src.TransactionFlagger.transaction_flagger", "TransactionFlagger"),
+    "generateReports": ("src.GenerateReports.generate_reports", "GenerateReports"),
+    "summaryConsole": ("src.ConsoleSummary.console_summary", "SummaryConsole"),
+    "checkpoints": ("src.Checkpoint.checkpoint_store", "CheckpointStore"),
+}
+
+DATA_PATH = "data/test_data.csv"
 
 
 class ConsoleApp:
     def __init__(self):
         self.data = None
-        self.dataManager = DataManagerc()
-        self.featureBuild = FeatureBuilder()
-        self.riskScore = RiskScorer()
-        self.flagger = TransactionFlagger()
-        self.generateReports = GenerateReports()
-        self.summaryConsole = SummaryConsole()
         self.console = Console()
+        # Every stage run from the menu is timed; option 9 shows and exports the results.
+        self.profiler = StageProfiler()
+        # Lineage of self.data: the checkpoint key it matches, its source file and the stages run on it.
+        self.data_key = None
+        self.source = None
+        self.lineage = []
+        # The customer index opened by option 11 and the modification time of its manifest.
+        self.customerIndex = None
+        self.customerIndexMtime = None
+
+    def __getattr__(self, name):
+        if name not in LAZY_STAGES:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        module_name, class_name = LAZY_STAGES[name]
+        stage = getattr(importlib.import_module(module_name), class_name)()
+        setattr(self, name, stage)
+        return stage
+
+    def run_checkpointed(self, name, func, *args, params=None, **kwargs):
+        """Run stage `name` on the current data, or restore its output if the same run was checkpointed."""
+        from src.Checkpoint.checkpoint_store import source_key
+
+        parent_key = source_key(self.source) if name == "load_data" else self.data_key
+        key = self.checkpoints.key(parent_key, name, params)
+        data = self.checkpoints.load(key)
+        if data is not None:
+            self.console.print(f"[cyan]Restored {name} output from checkpoint {key[:8]}[/]")
+        else:
+            data = self.profiler.measure(name, func, *args, **kwargs)
+            self.checkpoints.save(key, data, name, parent_key=parent_key, source=self.source,
+                                  lineage=self.lineage + [name])
+        self.data, self.data_key = data, key
+        self.lineage = self.lineage + [name]
+        return data
+
+    def resume_checkpoint(self):
+        manifest = self.checkpoints.latest()
+        data = None if manifest is None else self.checkpoints.load(manifest["key"])
+        if data is None:
+            self.console.print("[yellow]No valid checkpoint to resume from![/]\n")
+            return
+        self.data, self.data_key = data, manifest["key"]
+        self.source, self.lineage = manifest["source"], manifest["lineage"]
+        saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["created"]))
+        self.console.print(f"[green]Resumed {len(data):,} rows of {self.source} after "
+                           f"{' -> '.join(self.lineage)} (saved {saved})[/]\n")
+
+    def lookup_customer(self):
+        from src.CustomerIndex.customer_index import CustomerIndex
+
+        directory = os.path.join(self.generateReports.output_dir, self.generateReports.customer_index or "customer_index")
+        manifest = os.path.join(directory, "manifest.json")
+        mtime = os.path.getmtime(manifest) if os.path.exists(manifest) else None
+        # Reopened only when the reports were regenerated since the last lookup.
+        if self.customerIndex is None or mtime != self.customerIndexMtime:
+            self.customerIndex, self.customerIndexMtime = CustomerIndex.open(directory), mtime
+        index = self.customerIndex
+
+        customer = Prompt.ask("Customer (nameOrig)").strip()
+        start = time.perf_counter()
+        profile = index.profile(customer)
+        history = None if profile is None else index.history(customer)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if profile is None:
+            self.console.print(f"[yellow]Customer '{customer}' is not in the index![/]\n")
+            return
+
+        summary = Table(title=f"Risk Profile of {customer}", show_header=False)
+        summary.add_column("Field", style="bold cyan")
+        summary.add_column("Value", justify="right")
+        for field, value in profile.items():
+            summary.add_row(field, f"{value:,.2f}" if isinstance(value, float) else str(value))
+        self.console.print(summary)
+
+        shown = [col for col in ("step", "type", "amount", "nameDest", "final_risk_score", "risk_band", "is_suspicious")
+                 if col in history.columns]
+        table = Table(title=f"Transactions ({len(history):,}, last 20 shown)")
+        for col in shown:
+            table.add_column(col)
+        for row in history[shown].tail(20).itertuples(index=False):
+            table.add_row(*[f"{value:,.2f}" if isinstance(value, float) else str(value) for value in row])
+        self.console.print(table)
+        self.console.print(f"[dim]Looked up in {elapsed_ms:.3f} ms[/]\n")
+
+    def display_memory_report(self):
+        report = self.dataManager.memory_report(self.data)
+        table = Table(title="Memory Usage per Column")
+        table.add_column("Column", style="bold cyan")
+        table.add_column("Inferred (bytes)", justify="right")
+        table.add_column("Compact (bytes)", justify="right")
+        table.add_column("Saving", justify="right", style="green")
+        for _, row in report.iterrows():
+            table.add_row(str(row["column"]), f"{row['before_bytes']:,}", f"{row['after_bytes']:,}",
+                          f"{row['saving_pct']:.1f}%")
+        self.console.print(table)
+
+    def display_profile(self):
+        if not self.profiler.records:
+            self.console.print("[yellow]No stage has run yet![/]\n")
+        else:
+            self.console.print(self.profiler.table())
+
+        export = Prompt.ask("Export profile", choices=["none", "json", "trace"], default="none")
+        if export == "json":
+            self.console.print(f"[green]Profile saved to {self.profiler.save_json('profiles/stage_profile.json')}[/]")
+        elif export == "trace":
+            path = self.profiler.save_chrome_trace("profiles/stage_trace.json")
+            self.console.print(f"[green]Chrome trace saved to {path} (open in chrome://tracing or ui.perfetto.dev)[/]")
+
+        stages = ["load_data", "clean_data", "built_feature", "compute_scores", "is_suspicious", "generate_reports"]
+        stage = Prompt.ask(f"Capture a cProfile of a stage on its next run ({', '.join(stages)}; blank for none)",
+                           default="", show_default=False).strip()
+        if stage and stage not in stages:
+            self.console.print(f"[red]Error![/] Unknown stage '{stage}'!\n")
+        elif stage:
+            self.profiler.profile_stages.add(stage)
+            self.console.print(f"[green]{stage} will be profiled into {self.profiler.output_dir}/{stage}.prof[/]\n")
 
     def run(self):
         self.console.print(Panel("[bold white]Bank Analysis Project[/]", style="bold cyan"))
@@ -37,6 +161,10 @@ class ConsoleApp:
             menu.add_row("5", "Flag suspicious transactions")
             menu.add_row("6", "Export reports")
             menu.add_row("7", "Display summary in console")
+            menu.add_row("8", "Clear dataset cache and checkpoints")
+            menu.add_row("9", "Show stage profile")
+            menu.add_row("10", "Resume from latest checkpoint")
+            menu.add_row("11", "Look up a customer")
             menu.add_row("0", "Exit application")
             self.console.print(menu)
 
@@ -52,8 +180,11 @@ class ConsoleApp:
                 if choice == 1:
                     try:
                         self.console.print("[yellow]Loading dataset...[/]")
-                        self.data = self.dataManager.load_data("data/test_data.csv")
+                        self.source, self.lineage = DATA_PATH, []
+                        self.run_checkpointed("load_data", self.dataManager.load_data, DATA_PATH,
+                                              params={"dedup_key": self.dataManager.dedup_key})
                         self.console.print("[green]Data loaded successfully![/]\n")
+                        self.display_memory_report()
                     except FileNotFoundError as e:
                         print(f"Error: {e}\n")
                     except Exception as e:
@@ -63,7 +194,8 @@ class ConsoleApp:
                     if self.data is not None:
                         try:
                             self.console.print("[yellow]Cleaning data...[/]")
-                            self.data = self.dataManager.clean_data(self.data)
+                            self.run_checkpointed("clean_data", self.dataManager.clean_data, self.data,
+                                                  params={"dedup_key": self.dataManager.dedup_key})
                             self.console.print("[green]Data cleaned successfully![/]\n")
                         except ValueError as e:
                             print(f"Error: {e}\n")
@@ -76,7 +208,9 @@ class ConsoleApp:
                     if self.data is not None:
                         try:
                             self.console.print("[yellow]Building features...[/]")
-                            self.data = self.featureBuild.built_feature(self.data)
+                            self.run_checkpointed("built_feature", self.featureBuild.built_feature, self.data,
+                                                  params={"velocity_windows": self.featureBuild.velocity_windows,
+                                                          "graph": self.featureBuild.graph})
                             self.console.print("[green]Features built successfully![/]\n")
 
                         except ValueError as e:
@@ -90,7 +224,9 @@ class ConsoleApp:
                     if self.data is not None:
                         try:
                             self.console.print("[yellow]Computing risk scores for each customer...[/]")
-                            self.data = self.riskScore.compute_scores(self.data)
+                            self.run_checkpointed("compute_scores", self.riskScore.compute_scores, self.data,
+                                                  params={"features": self.riskScore.features,
+                                                          "band_thresholds": self.riskScore.band_thresholds})
                             self.console.print("[green]Risk scores computed successfully![/]\n")
 
                         except ValueError as e:
@@ -104,7 +240,7 @@ class ConsoleApp:
                     if self.data is not None:
                         try:
                             self.console.print("[yellow]Flagging suspicious transactions...[/]")
-                            self.flagger.is_suspicious(self.data)
+                            self.run_checkpointed("is_suspicious", self.flagger.is_suspicious, self.data)
                             self.console.print("[green]Suspicious transactions flagged successfully![/]\n")
                         except ValueError as e:
                             print(f"Error: {e}\n")
@@ -117,7 +253,7 @@ class ConsoleApp:
                     if self.data is not None:
                         try:
                             self.console.print("[yellow]Generating reports...[/]")
-                            self.generateReports.generate_reports(self.data)
+                            self.profiler.measure("generate_reports", self.generateReports.generate_reports, self.data)
                             self.console.print("[green]Reports generated successfully![/]\n")
                         except Exception as e:
                             print(f"Error: {e}\n")
@@ -133,6 +269,32 @@ class ConsoleApp:
                     else:
                         print("Error: No data loaded! Please load data first.\n")
 
+                elif choice == 8:
+                    try:
+                        removed = self.dataManager.clear_cache()
+                        checkpoints = self.checkpoints.clear()
+                        self.console.print(f"[green]Cleared {removed} cached dataset(s) and {checkpoints} checkpoint(s)![/]\n")
+                    except Exception as e:
+                        print(f"Error: {e}\n")
+
+                elif choice == 9:
+                    try:
+                        self.display_profile()
+                    except Exception as e:
+                        print(f"Error: {e}\n")
+
+                elif choice == 10:
+                    try:
+                        self.resume_checkpoint()
+                    except Exception as e:
+                        print(f"Error: {e}\n")
+
+                elif choice == 11:
+                    try:
+                        self.lookup_customer()
+                    except Exception as e:
+                        print(f"Error: {e}\n")
+
                 elif choice == 0:
                     self.console.print("\n[bold]Thank you for using the application![/]")
                     break
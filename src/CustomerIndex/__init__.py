@@ -0,0 +1 @@
+from src.CustomerIndex import customer_index
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+
+INDEX_FORMAT = 1
+
+
+def sorted_account_codes(values):
+    """Code per row into the sorted distinct accounts (-1 for missing), and those accounts."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories.to_numpy().astype(str)
+        order = np.argsort(categories, kind="stable")
+        rank = np.empty(len(order) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        # Code -1 (missing) indexes the appended entry and stays -1.
+        rank[-1] = -1
+        return rank[values.cat.codes.to_numpy()], categories[order]
+    codes, accounts = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), np.asarray(accounts).astype(str)
+
+
+class CustomerIndex:
+    """Scored transactions sorted by customer, with offsets, as memory-mapped NumPy files.
+
+    `offsets[code]:offsets[code + 1]` are the rows of the customer `accounts[code]`, and
+    `accounts` is sorted, so a lookup is one binary search plus slicing each column file;
+    nothing is scanned and only the pages of that customer are read from disk. Every column
+    is stored as a `.npy` file (categoricals as codes plus a categories file) next to a
+    `manifest.json`, and the whole directory is replaced atomically on rebuild.
+    """
+
+    def __init__(self, directory, accounts, offsets, columns, dtypes, built=None):
+        self.directory = directory
+        self.accounts = accounts
+        self.offsets = offsets
+        self.columns = columns
+        self.dtypes = dtypes
+        self.built = built
+
+    def __len__(self):
+        return len(self.accounts)
+
+    @classmethod
+    def build(cls, data, directory):
+        """Write the index of `data` (one row per transaction, with `nameOrig`) to `directory`."""
+        if data is None or len(data) == 0:
+            raise ValueError("Dataframe is empty or None!")
+        if "nameOrig" not in data.columns:
+            raise ValueError("Missing columns: nameOrig!")
+
+        codes, accounts = sorted_account_codes(data["nameOrig"])
+        # Unused categories are not customers of this data.
+        counts = np.bincount(codes[codes >= 0], minlength=len(accounts))
+        if not counts.all():
+            remap = np.append(np.cumsum(counts > 0) - 1, -1)
+            codes, accounts = remap[codes], accounts[counts > 0]
+        # Rows without a customer cannot be looked up; the rest keep their order within a customer.
+        order = np.argsort(codes, kind="stable")
+        order = order[np.searchsorted(codes[order], 0):]
+        offsets = np.zeros(len(accounts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes[order], minlength=len(accounts)), out=offsets[1:])
+
+        tmp_dir = f"{directory.rstrip(os.sep)}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "accounts.npy"), accounts)
+        np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+
+        columns = {}
+        for col in data.columns:
+            values = data[col]
+            if values.dtype == object:
+                values = values.astype("category")
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                np.save(os.path.join(tmp_dir, f"{col}.npy"), values.cat.codes.to_numpy()[order])
+                np.save(os.path.join(tmp_dir, f"{col}.categories.npy"),
+                        values.cat.categories.to_numpy().astype(str))
+                columns[col] = {"kind": "category", "ordered": bool(values.cat.ordered)}
+            else:
+                np.save(os.path.join(tmp_dir, f"{col}.npy"), values.to_numpy()[order])
+                columns[col] = {"kind": "values"}
+
+        manifest = {"format": INDEX_FORMAT, "rows": int(len(order)), "customers": int(len(accounts)),
+                    "columns": columns, "built": time.time()}
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the finished directory in, so a reader never sees half an index.
+        old_dir = f"{directory.rstrip(os.sep)}.old-{os.getpid()}"
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory):
+        """Memory-map an index written by `build`."""
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"No customer index in {directory}! Generate the reports first.")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported customer index format: {manifest.get('format')}")
+
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        columns, dtypes = {}, {}
+        for col, spec in manifest["columns"].items():
+            columns[col] = load(col)
+            if spec["kind"] == "category":
+                # Built once here, so each lookup only wraps its slice of codes.
+                dtypes[col] = pd.CategoricalDtype(load(f"{col}.categories"), ordered=spec["ordered"])
+        return cls(directory, load("accounts"), load("offsets"), columns, dtypes, built=manifest["built"])
+
+    def rows(self, customer):
+        """(start, stop) of the customer's rows, or None if the customer is not in the index."""
+        code = int(np.searchsorted(self.accounts, customer))
+        if code >= len(self.accounts) or self.accounts[code] != customer:
+            return None
+        return int(self.offsets[code]), int(self.offsets[code + 1])
+
+    def history(self, customer, columns=None):
+        """Every transaction of `customer` with its features and scores; empty if unknown."""
+        bounds = self.rows(customer) or (0, 0)
+        columns = list(self.columns) if columns is None else columns
+        frame = {}
+        for col in columns:
+            # Copied out of the map, so the frame does not pin the index files open.
+            values = np.array(self.columns[col][bounds[0]:bounds[1]])
+            if col in self.dtypes:
+                # The codes were written from a frame of the same categories.
+                values = pd.Categorical.from_codes(values, dtype=self.dtypes[col], validate=False)
+            frame[col] = values
+        # The arrays are fresh copies; letting pandas copy them again doubles the lookup time.
+        return pd.DataFrame(frame, copy=False)
+
+    def profile(self, customer):
+        """Risk profile of `customer` from its indexed rows, or None if unknown."""
+        bounds = self.rows(customer)
+        if bounds is None:
+            return None
+        start, stop = bounds
+        profile = {"nameOrig": str(customer), "transactions": stop - start}
+        if "amount" in self.columns:
+            profile["total_amount"] = float(np.nansum(self.columns["amount"][start:stop], dtype=np.float64))
+        if "step" in self.columns:
+            steps = self.columns["step"][start:stop]
+            profile["first_step"], profile["last_step"] = int(steps.min()), int(steps.max())
+        if "final_risk_score" in self.columns:
+            scores = np.asarray(self.columns["final_risk_score"][start:stop], dtype=np.float64)
+            finite = scores[~np.isnan(scores)]
+            profile["max_score"] = float(finite.max()) if len(finite) else None
+            profile["mean_score"] = float(finite.mean()) if len(finite) else None
+        if "risk_band" in self.columns:
+            # The band of the customer's last transaction, like the customer risk summary.
+            code = int(self.columns["risk_band"][stop - 1])
+            profile["latest_band"] = str(self.dtypes["risk_band"].categories[code]) if code >= 0 else None
+        if "is_suspicious" in self.columns:
+            profile["flagged"] = int(np.count_nonzero(self.columns["is_suspicious"][start:stop]))
+        return profile
@@ -0,0 +1 @@
+from src.DataGenerator import data_generator
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import pandas as pd
+from src.DataManager.schema import TRANSACTION_TYPES, apply_schema
+
+
+# Share of each transaction type in the PaySim dataset, in TRANSACTION_TYPES order.
+TYPE_SHARES = {"CASH_IN": 0.22, "CASH_OUT": 0.352, "DEBIT": 0.007, "PAYMENT": 0.338, "TRANSFER": 0.083}
+# PaySim only ever labels these types as fraud, and flags large fraudulent transfers.
+FRAUD_TYPES = ("CASH_OUT", "TRANSFER")
+FLAGGED_FRAUD_AMOUNT = 200_000
+STEPS = 743
+
+
+class DataGenerator:
+    """Seeded PaySim-schema transactions at any scale.
+
+    Customers are drawn with Zipf-like weights, rank ** -skew, so a few accounts carry most
+    transactions (skew=0 is uniform). Payments go to merchants ("M..."), everything else to
+    other customers ("C..."). Rows come out in step order like PaySim, and chunk `i` is
+    drawn from its own stream of the seed, so the same (seed, rows, chunksize) always
+    gives the same data, in memory or on disk.
+    """
+
+    def __init__(self, seed=0, n_customers=None, n_merchants=None, skew=1.0, fraud_rate=0.0013, steps=STEPS):
+        if skew < 0:
+            raise ValueError("skew must be zero or positive!")
+        if not 0 <= fraud_rate <= 1:
+            raise ValueError("fraud_rate must be between 0 and 1!")
+        self.seed = seed
+        self.n_customers = n_customers
+        self.n_merchants = n_merchants
+        self.skew = skew
+        self.fraud_rate = fraud_rate
+        self.steps = steps
+
+    def generate(self, n_rows, chunksize=1_000_000):
+        """The whole dataset as one frame in the compact schema."""
+        chunks = list(self.chunks(n_rows, chunksize))
+        return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+    def write_csv(self, path, n_rows, chunksize=1_000_000):
+        """Write the dataset chunk by chunk, so memory stays bounded by `chunksize`."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            for i, chunk in enumerate(self.chunks(n_rows, chunksize)):
+                chunk.to_csv(f, index=False, header=i == 0)
+        os.replace(tmp_path, path)
+        return path
+
+    def chunks(self, n_rows, chunksize=1_000_000):
+        if n_rows <= 0:
+            raise ValueError("n_rows must be positive!")
+        n_customers = self.n_customers or max(n_rows // 5, 1)
+        n_merchants = self.n_merchants or max(n_customers // 2, 1)
+        customers = pd.Index([f"C{i}" for i in range(n_customers)])
+        accounts = customers.append(pd.Index([f"M{i}" for i in range(n_merchants)]))
+        weights = np.arange(1, n_customers + 1, dtype=np.float64) ** -self.skew
+        customer_cdf = np.cumsum(weights / weights.sum())
+
+        for i, start in enumerate(range(0, n_rows, chunksize)):
+            rng = np.random.default_rng([self.seed, i])
+            rows = np.arange(start, min(start + chunksize, n_rows))
+            yield self._chunk(rng, rows, n_rows, customer_cdf, customers, accounts, n_customers, n_merchants)
+
+    def _chunk(self, rng, rows, n_rows, customer_cdf, customers, accounts, n_customers, n_merchants):
+        n = len(rows)
+        shares = np.array([TYPE_SHARES[t] for t in TRANSACTION_TYPES])
+        types = np.searchsorted(np.cumsum(shares / shares.sum()), rng.random(n), side="right")
+        types = np.minimum(types, len(TRANSACTION_TYPES) - 1)
+        is_payment = types == TRANSACTION_TYPES.index("PAYMENT")
+
+        orig = np.minimum(np.searchsorted(customer_cdf, rng.random(n)), n_customers - 1)
+        dest = np.minimum(np.searchsorted(customer_cdf, rng.random(n)), n_customers - 1)
+        dest[is_payment] = n_customers + rng.integers(0, n_merchants, int(is_payment.sum()))
+
+        amount = np.round(rng.lognormal(9.5, 1.6, n), 2)
+        amount[is_payment] = np.round(rng.lognormal(8.5, 1.0, int(is_payment.sum())), 2)
+        old_orig = np.round(rng.lognormal(10, 2.5, n) * (rng.random(n) > 0.3), 2)
+        old_dest = np.round(rng.lognormal(12, 2.5, n) * (rng.random(n) > 0.4), 2)
+        old_dest[is_payment] = 0.0
+
+        fraud_type = np.isin(types, [TRANSACTION_TYPES.index(t) for t in FRAUD_TYPES])
+        # The overall rate is `fraud_rate`, all of it landing on the types PaySim allows.
+        fraud_share = fraud_type.mean() if fraud_type.any() else 1.0
+        is_fraud = fraud_type & (rng.random(n) < min(self.fraud_rate / fraud_share, 1.0))
+        # Fraud empties the origin account.
+        old_orig[is_fraud] = np.maximum(old_orig[is_fraud], amount[is_fraud])
+        amount[is_fraud] = old_orig[is_fraud]
+
+        is_cash_in = types == TRANSACTION_TYPES.index("CASH_IN")
+        new_orig = np.where(is_cash_in, old_orig + amount, np.maximum(old_orig - amount, 0.0))
+        new_dest = np.where(is_payment, 0.0, np.where(is_cash_in, np.maximum(old_dest - amount, 0.0), old_dest + amount))
+        is_flagged = is_fraud & (types == TRANSACTION_TYPES.index("TRANSFER")) & (amount > FLAGGED_FRAUD_AMOUNT)
+
+        data = pd.DataFrame({
+            "step": 1 + rows * self.steps // n_rows,
+            "type": pd.Categorical.from_codes(types, TRANSACTION_TYPES),
+            "amount": amount,
+            "nameOrig": pd.Categorical.from_codes(orig, customers),
+            "oldbalanceOrg": old_orig,
+            "newbalanceOrig": np.round(new_orig, 2),
+            "nameDest": pd.Categorical.from_codes(dest, accounts),
+            "oldbalanceDest": old_dest,
+            "newbalanceDest": np.round(new_dest, 2),
+            "isFraud": is_fraud.astype(np.int8),
+            "isFlaggedFraud": is_flagged.astype(np.int8),
+        })
+        return apply_schema(data)
@@ -1,34 +1,155 @@
 import pandas as pd
+import hashlib
+import glob
 import os
+from src.DataManager.schema import REQUIRED_COLUMNS, read_dtypes, apply_schema, validate_schema, concat_frames, memory_report
+from src.DataManager.validation import TRANSACTION_KEY, REJECT_REASONS, reject_mask, reason_labels
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Bump when the cached frame layout changes so older cache files are ignored.
+CACHE_FORMAT = 4
 
 class DataManagerc:
-    def __init__(self):
-        pass
+    def __init__(self, cache_dir=".cache", use_cache=True, dedup_key=None,
+                 quarantine_dir="quarantine", columns=None):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache and feather is not None
+        self.dedup_key = list(TRANSACTION_KEY if dedup_key is None else dedup_key)
+        self.quarantine_dir = quarantine_dir
+        # Only these columns are read from the CSV; None reads them all.
+        self.columns = None if columns is None else list(columns)
+        # Rows rejected by clean_data since the last quarantine file was written.
+        self.rejects = []
+
+    def required_columns(self):
+        return list(self.dedup_key)
 
+    def produced_columns(self):
+        return []
 
     def load_data(self,path_file):
         if not os.path.exists(path_file):
             raise FileNotFoundError(f"The file {path_file} does not exist.")
 
+        if self.use_cache:
+            cache_path = self._cache_path(path_file)
+            if os.path.exists(cache_path):
+                # Cached frames are already cleaned; cleaning them again is a no-op.
+                return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+        self.rejects = []
         try:
-            data=pd.read_csv(path_file)
+            data=apply_schema(pd.read_csv(path_file, usecols=self.columns, dtype=read_dtypes(self.columns)))
+            data.attrs["source_path"] = path_file
             return data
         except pd.errors.EmptyDataError:
-            raise f"the file {path_file} is Empty!"
+            raise ValueError(f"the file {path_file} is Empty!")
+
+    def stream_data(self, path_file, chunksize, stages=()):
+        """Yield cleaned chunks of at most `chunksize` rows, each passed through `stages` in order.
+
+        Stages run on one chunk at a time, so per-customer aggregates computed by a stage
+        only cover the rows of that chunk, and duplicates are only removed within a chunk.
+        Memory stays bounded by the chunk size as long as the caller keeps no chunk.
+        """
+        if not os.path.exists(path_file):
+            raise FileNotFoundError(f"The file {path_file} does not exist.")
+
+        with pd.read_csv(path_file, chunksize=chunksize, usecols=self.columns,
+                         dtype=read_dtypes(self.columns)) as reader:
+            for chunk in reader:
+                chunk = self.clean_data(chunk)
+                for stage in stages:
+                    chunk = stage(chunk)
+                yield chunk
 
     def clean_data(self,data):
 
             if data is not None:
-                data.dropna(inplace=True)
-                data.drop_duplicates(inplace=True)
+                # String columns become categoricals first, so the key hashes their codes.
+                apply_schema(data)
+                # Rows failing a check are set aside with their reasons instead of silently dropped.
+                mask = reject_mask(data, self.dedup_key)
+                source_path = data.attrs.pop("source_path", None)
+                if mask.any():
+                    rejected = mask != 0
+                    rejects = data[rejected].copy()
+                    rejects["reject_reason"] = reason_labels(mask[rejected])
+                    self.rejects.append(rejects)
+                    # A shallow copy lets apply_schema swap columns without a SettingWithCopyWarning.
+                    data = data[~rejected].copy(deep=False)
+                    if (mask & REJECT_REASONS["MISSING_VALUE"]).any():
+                        # Columns that held NaNs can only take their compact dtype once those rows are gone.
+                        apply_schema(data)
+                validate_schema(data, [col for col in REQUIRED_COLUMNS if self.columns is None or col in self.columns])
+                if source_path is not None:
+                    self.write_quarantine(source_path)
+                if self.use_cache and source_path is not None:
+                    self._write_cache(data, source_path)
                 return data
             else:
                 print("Data not loaded. Please load data before cleaning!!\n")
 
+    def write_quarantine(self, path_file):
+        """Write the rows rejected since the last call to <quarantine_dir>/<source>_quarantine.csv."""
+        name = os.path.splitext(os.path.basename(path_file))[0]
+        quarantine_path = os.path.join(self.quarantine_dir, f"{name}_quarantine.csv")
+        rejects, self.rejects = self.rejects, []
+        if not rejects:
+            # A clean file leaves no quarantine behind from an earlier run.
+            if os.path.exists(quarantine_path):
+                os.remove(quarantine_path)
+            return None
 
+        rejects = concat_frames(rejects)
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        tmp_path = quarantine_path + ".tmp"
+        rejects.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, quarantine_path)
 
+        counts = {reason: int(count) for reason, count in rejects["reject_reason"].value_counts().items()}
+        print(f"⚠️ Quarantined {len(rejects):,} row(s) to {quarantine_path}: {counts}")
+        return quarantine_path
 
+    def memory_report(self, data):
+        return memory_report(data)
 
+    def clear_cache(self):
+        """Delete every cached dataset and return how many files were removed."""
+        removed = 0
+        for cache_file in glob.glob(os.path.join(self.cache_dir, "*.feather")):
+            os.remove(cache_file)
+            removed += 1
+        return removed
 
+    def _cache_path(self, path_file):
+        # The name is <path hash>-<size/mtime hash>, so a changed source gets a new
+        # entry and the stale one can be found by its prefix.
+        stat = os.stat(path_file)
+        source = os.path.abspath(path_file)
+        if self.columns is not None:
+            # A projected load caches only its columns, so each column set gets its own entry.
+            source += "|" + ",".join(sorted(self.columns))
+        # Which rows survive cleaning depends on the dedup key, so each key gets its own entry.
+        source += "|key=" + ",".join(sorted(self.dedup_key))
+        path_key = hashlib.sha1(source.encode()).hexdigest()[:16]
+        version_key = hashlib.sha1(f"{CACHE_FORMAT}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{path_key}-{version_key}.feather")
 
+    def _write_cache(self, data, path_file):
+        if not os.path.exists(path_file):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self._cache_path(path_file)
+        path_key = os.path.basename(cache_path).split("-")[0]
+        for stale in glob.glob(os.path.join(self.cache_dir, f"{path_key}-*.feather")):
+            os.remove(stale)
 
+        # Uncompressed so later loads can memory-map the file directly.
+        tmp_path = cache_path + ".tmp"
+        feather.write_feather(data, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
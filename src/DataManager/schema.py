@@ -0,0 +1,139 @@
+import sys
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+TRANSACTION_TYPES = ["CASH_IN", "CASH_OUT", "DEBIT", "PAYMENT", "TRANSFER"]
+
+# Declared storage type of every PaySim column. Float columns are stored as float32
+# only when the values survive the round trip within FLOAT_TOLERANCE, otherwise they
+# stay float64.
+TRANSACTION_SCHEMA = {
+    "step": "int32",
+    "type": "category",
+    "amount": "float32",
+    "nameOrig": "category",
+    "oldbalanceOrg": "float32",
+    "newbalanceOrig": "float32",
+    "nameDest": "category",
+    "oldbalanceDest": "float32",
+    "newbalanceDest": "float32",
+    "isFraud": "int8",
+    "isFlaggedFraud": "int8",
+}
+
+REQUIRED_COLUMNS = [
+    "step", "type", "amount", "nameOrig", "oldbalanceOrg",
+    "newbalanceOrig", "nameDest", "oldbalanceDest", "newbalanceDest",
+]
+
+CATEGORY_COLUMNS = [col for col, dtype in TRANSACTION_SCHEMA.items() if dtype == "category"]
+
+FLOAT_TOLERANCE = 0.005
+
+
+def read_dtypes(columns=None):
+    """dtype hints for pd.read_csv; only categoricals are safe to declare before NaNs are dropped."""
+    columns = TRANSACTION_SCHEMA if columns is None else columns
+    return {col: "category" for col in CATEGORY_COLUMNS if col in columns}
+
+
+def apply_schema(data):
+    """Convert the schema columns of `data` in place to their compact dtypes and return it."""
+    for col, dtype in TRANSACTION_SCHEMA.items():
+        if col not in data.columns:
+            continue
+        values = data[col]
+
+        if dtype == "category":
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                data[col] = values.astype("category")
+            elif not values.cat.ordered and not values.cat.categories.is_monotonic_increasing:
+                # read_csv joins the categories of its internal blocks in order of appearance;
+                # sorted, they no longer depend on how the file happened to be split.
+                data[col] = values.cat.reorder_categories(values.cat.categories.sort_values())
+
+        elif dtype.startswith("int"):
+            info = np.iinfo(dtype)
+            if values.dtype != dtype and not values.isna().any() \
+                    and (values.empty or (values.min() >= info.min and values.max() <= info.max)):
+                data[col] = values.astype(dtype)
+
+        elif values.dtype == np.float64:
+            compact = values.to_numpy().astype(np.float32)
+            error = np.abs(compact.astype(np.float64) - values.to_numpy())
+            if not len(error) or np.nanmax(error) <= FLOAT_TOLERANCE:
+                data[col] = compact
+
+    return data
+
+
+def validate_schema(data, columns=None):
+    """Raise ValueError listing every required column that is missing or has the wrong dtype."""
+    columns = REQUIRED_COLUMNS if columns is None else columns
+    problems = []
+    for col in columns:
+        if col not in data.columns:
+            problems.append(f"missing column '{col}'")
+            continue
+
+        expected = TRANSACTION_SCHEMA.get(col)
+        dtype = data[col].dtype
+        if expected == "category":
+            valid = isinstance(dtype, pd.CategoricalDtype)
+        elif expected is not None and expected.startswith("int"):
+            valid = pd.api.types.is_integer_dtype(dtype)
+        elif expected is not None:
+            valid = pd.api.types.is_float_dtype(dtype)
+        else:
+            valid = True
+        if not valid:
+            problems.append(f"column '{col}' has dtype {dtype}, expected {expected}")
+
+    if problems:
+        raise ValueError("Invalid transaction data: " + "; ".join(problems))
+
+
+def concat_frames(frames):
+    """Concatenate compact frames, unioning categories so categorical columns stay categorical."""
+    frames = list(frames)
+    if not frames:
+        raise ValueError("Dataframe is empty or None!")
+
+    for col in CATEGORY_COLUMNS:
+        if all(col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            # Sorted, as apply_schema orders the categories of a whole-file load, so the result
+            # does not depend on where the frames were split.
+            categories = union_categoricals([frame[col] for frame in frames], sort_categories=True).categories
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_report(data):
+    """Bytes per column as loaded versus as pandas would infer them (object strings, 64-bit numbers)."""
+    rows = []
+    for col in data.columns:
+        values = data[col]
+        after = values.memory_usage(index=False, deep=True)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # An object column holds one pointer plus one Python string per row.
+            counts = np.bincount(values.cat.codes[values.cat.codes >= 0], minlength=len(values.cat.categories))
+            sizes = np.fromiter((sys.getsizeof(cat) for cat in values.cat.categories), dtype=np.int64,
+                                count=len(values.cat.categories))
+            before = 8 * len(values) + int(counts @ sizes)
+        elif pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            before = 8 * len(values)
+        else:
+            before = after
+        rows.append({"column": col, "before_bytes": before, "after_bytes": after})
+
+    report = pd.DataFrame(rows, columns=["column", "before_bytes", "after_bytes"])
+    total = pd.DataFrame([{"column": "TOTAL",
+                           "before_bytes": report["before_bytes"].sum(),
+                           "after_bytes": report["after_bytes"].sum()}])
+    report = pd.concat([report, total], ignore_index=True)
+    report["saving_pct"] = (1 - report["after_bytes"] / report["before_bytes"].replace(0, np.nan)).fillna(0.0) * 100
+    return report
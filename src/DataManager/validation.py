@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from src.DataManager.schema import TRANSACTION_TYPES, REQUIRED_COLUMNS, FLOAT_TOLERANCE
+
+
+# Columns that identify one transaction; rows agreeing on all of them are duplicates.
+TRANSACTION_KEY = list(REQUIRED_COLUMNS)
+
+# One bit per reject reason, so a row failing several checks keeps all of its reasons.
+REJECT_REASONS = {
+    "MISSING_VALUE": 1,
+    "DUPLICATE": 2,
+    "NEGATIVE_AMOUNT": 4,
+    "NEGATIVE_BALANCE": 8,
+    "BALANCE_INCREASED_ON_DEBIT": 16,
+    "UNKNOWN_TYPE": 32,
+}
+BALANCE_COLUMNS = ["oldbalanceOrg", "newbalanceOrig", "oldbalanceDest", "newbalanceDest"]
+# Types that take money out of the origin account.
+DEBIT_TYPES = ["CASH_OUT", "DEBIT", "PAYMENT", "TRANSFER"]
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def column_words(values):
+    """One 64-bit word per row of one column, equal exactly when the values are, within the same frame.
+
+    String columns use their category (or factorized) codes rather than the strings, so a
+    name column costs the same as an integer one.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.uint64)
+    if values.dtype == object:
+        return pd.factorize(values.to_numpy())[0].astype(np.uint64)
+    values = values.to_numpy()
+    if values.dtype.kind == "f":
+        return values.astype(np.float64).view(np.uint64)
+    return values.astype(np.uint64)
+
+
+def key_hashes(data, columns=None):
+    """One 64-bit hash per row over the key columns, instead of comparing whole rows."""
+    columns = TRANSACTION_KEY if columns is None else columns
+    hashes = np.zeros(len(data), dtype=np.uint64)
+    for col in columns:
+        # Xor-then-multiply is a bijection in each column, so rows differing in one key column never collide.
+        hashes ^= column_words(data[col])
+        hashes *= _MULTIPLIER
+    # A final mix spreads the structured words over all 64 bits.
+    return pd.util.hash_array(hashes)
+
+
+def reject_mask(data, key=None):
+    """Bitmask of REJECT_REASONS per row, 0 for rows that pass every check, in one vectorized pass."""
+    mask = np.zeros(len(data), dtype=np.uint8)
+
+    mask[data.isna().any(axis=1).to_numpy()] |= REJECT_REASONS["MISSING_VALUE"]
+
+    key = [col for col in (TRANSACTION_KEY if key is None else key) if col in data.columns]
+    if key:
+        # With 64-bit hashes a false match needs ~4 billion rows to become likely.
+        duplicate = pd.Series(key_hashes(data, key)).duplicated(keep="first").to_numpy()
+        mask[duplicate] |= REJECT_REASONS["DUPLICATE"]
+
+    if "amount" in data.columns:
+        mask[(data["amount"] < 0).to_numpy()] |= REJECT_REASONS["NEGATIVE_AMOUNT"]
+
+    balances = [col for col in BALANCE_COLUMNS if col in data.columns]
+    if balances:
+        negative = np.zeros(len(data), dtype=bool)
+        for col in balances:
+            negative |= (data[col] < 0).to_numpy()
+        mask[negative] |= REJECT_REASONS["NEGATIVE_BALANCE"]
+
+    if "type" in data.columns:
+        types = data["type"]
+        if isinstance(types.dtype, pd.CategoricalDtype):
+            codes = types.cat.codes.to_numpy()
+            known = np.append(types.cat.categories.isin(TRANSACTION_TYPES), True)
+            is_debit = np.append(types.cat.categories.isin(DEBIT_TYPES), False)
+            # Code -1 (missing) indexes the appended entry: not unknown, not a debit.
+            unknown, debit = ~known[codes], is_debit[codes]
+        else:
+            unknown = ~(types.isin(TRANSACTION_TYPES) | types.isna()).to_numpy()
+            debit = types.isin(DEBIT_TYPES).to_numpy()
+        mask[unknown] |= REJECT_REASONS["UNKNOWN_TYPE"]
+
+        if {"oldbalanceOrg", "newbalanceOrig"} <= set(data.columns):
+            grew = (data["newbalanceOrig"] - data["oldbalanceOrg"]).to_numpy() > FLOAT_TOLERANCE
+            mask[debit & grew] |= REJECT_REASONS["BALANCE_INCREASED_ON_DEBIT"]
+
+    return mask
+
+
+def reason_labels(mask):
+    """'NEGATIVE_AMOUNT|UNKNOWN_TYPE'-style labels for a reject bitmask, built once per distinct value."""
+    values, inverse = np.unique(mask, return_inverse=True)
+    labels = np.array(["|".join(name for name, bit in REJECT_REASONS.items() if value & bit) for value in values],
+                      dtype=object)
+    return labels[inverse]
@@ -1,10 +1,128 @@
 import numpy as np
 import pandas as pd
+from src.FeatureBuilder.graph_features import GraphFeatureBuilder
+
+
+AGGREGATE_COLUMNS = ["count_transaction", "total_amount", "avg_amount", "max_amount", "std_amount"]
+
+# Trailing windows for the velocity features, in hours (one step is one hour).
+VELOCITY_WINDOWS = {"1h": 1, "6h": 6, "24h": 24, "7d": 168}
+
+
+# Fixed-point scale of the fractional amounts summed by window_velocity.
+FRACTION_SCALE = 2 ** 32
+
+
+def velocity_columns(windows=VELOCITY_WINDOWS):
+    return [f"velocity_{kind}_{label}" for label in windows for kind in ("count", "amount")]
+
+
+def account_codes(values):
+    """Integer code per row for an account column (-1 for missing) and the number of accounts.
+
+    Categorical columns reuse their existing codes, so the key is only factorized once.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.intp), len(values.cat.categories)
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.intp), len(uniques)
+
+
+def group_stats(codes, amount, n_groups):
+    """count, sum, mean, max and sample std of `amount` per code, in one pass of bincount kernels."""
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=amount, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        deviation = amount - mean[codes]
+        m2 = np.bincount(codes, weights=deviation * deviation, minlength=n_groups)
+        std = np.sqrt(m2 / (count - 1))
+    std[count < 2] = np.nan
+
+    maximum = np.full(n_groups, -np.inf)
+    np.maximum.at(maximum, codes, amount)
+    maximum[count == 0] = np.nan
+    return count, total, mean, maximum, std
+
+
+def bucket_counts(codes, buckets):
+    """Number of rows sharing each row's (code, bucket) pair, broadcast back per row."""
+    buckets = buckets - buckets.min()
+    keys = codes.astype(np.int64) * (int(buckets.max()) + 1) + buckets
+    key_codes, _ = pd.factorize(keys)
+    return np.bincount(key_codes)[key_codes]
+
+
+def window_velocity(codes, step, amount, windows=VELOCITY_WINDOWS):
+    """Per row, the number and total amount of the account's transactions in each trailing window.
+
+    A w-hour window of a row at step t covers steps t-w+1 .. t of the same account, so
+    transactions in the same step count each other whatever their row order. Rows are
+    sorted once by (account, step) and each distinct (account, step) is evaluated once:
+    window bounds are a searchsorted on the sorted keys and amount sums are differences of
+    a cumulative sum, so the cost is one sort plus a linear pass per window however bursty
+    an account is.
+    """
+    step = np.asarray(step, dtype=np.int64)
+    first = int(step.min())
+    # Each account gets a stretch of keys wide enough that no window reaches into the previous account.
+    span = int(step.max()) - first + max(windows.values()) + 1
+    keys = codes.astype(np.int64) * span + (step - first)
+    # Rows sharing a key get the same features, so the sort need not be stable.
+    order = np.argsort(keys)
+    keys = keys[order]
+
+    is_start = np.empty(len(keys), dtype=bool)
+    is_start[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(keys))
+    run_keys = keys[starts]
+    run_of_row = np.empty(len(keys), dtype=np.intp)
+    run_of_row[order] = np.cumsum(is_start) - 1
+
+    # A window's total must depend only on the account's own rows, so the serial and the
+    # sharded pipelines give identical results whatever rows are sorted before an account.
+    # A float prefix sum would carry the rounding of every earlier row, so the prefix sums
+    # are exact integers instead: whole units, and the fraction in fixed point of 2**-32
+    # (a fraction below that rounds, and 2**31 rows fit before the sums could overflow).
+    amount = np.asarray(amount, dtype=np.float64)[order]
+    # A missing amount adds nothing, instead of turning every later sum into NaN.
+    amount[np.isnan(amount)] = 0.0
+    whole = np.floor(amount)
+    cumulative_whole = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(whole.astype(np.int64), out=cumulative_whole[1:])
+    cumulative_fraction = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.rint((amount - whole) * FRACTION_SCALE).astype(np.int64), out=cumulative_fraction[1:])
+
+    features = {}
+    for label, hours in windows.items():
+        lower = starts[np.searchsorted(run_keys, run_keys - (hours - 1), side="left")]
+        total = ((cumulative_whole[ends] - cumulative_whole[lower])
+                 + (cumulative_fraction[ends] - cumulative_fraction[lower]) / FRACTION_SCALE)
+        features[f"velocity_count_{label}"] = (ends - lower)[run_of_row]
+        features[f"velocity_amount_{label}"] = total[run_of_row]
+    return features
 
 
 class FeatureBuilder:
-    def __init__(self):
-        pass
+    REQUIRED_COLUMNS = ["step", "amount", "nameOrig", "oldbalanceOrg", "newbalanceOrig"]
+
+    def __init__(self, velocity_windows=VELOCITY_WINDOWS, graph=True):
+        # Pass an empty dict to skip the windowed velocity features.
+        self.velocity_windows = velocity_windows
+        self.graph = graph
+
+    def required_columns(self):
+        columns = list(self.REQUIRED_COLUMNS)
+        if self.graph:
+            columns += [col for col in GraphFeatureBuilder.REQUIRED_COLUMNS if col not in columns]
+        return columns
+
+    def produced_columns(self):
+        columns = ["day"] + AGGREGATE_COLUMNS + ["z_score", "daily_velocity_count", "errorBalanceOrig"]
+        columns += velocity_columns(self.velocity_windows or {})
+        return columns + (GraphFeatureBuilder().produced_columns() if self.graph else [])
 
     def built_feature(self, data):
         if data is None or data.empty:
@@ -12,16 +130,30 @@ class FeatureBuilder:
 
         data["day"] = np.ceil(data["step"] / 24).astype(np.int32)
 
-        orig_groups = data.groupby("nameOrig")["amount"]
-        agg_stats = orig_groups.agg(['count', 'sum', 'mean', 'max', 'std'])
-        agg_stats.columns = ["count_transaction", "total_amount", "avg_amount", "max_amount", "std_amount"]
+        codes, n_accounts = account_codes(data["nameOrig"])
+        amount = data["amount"].to_numpy(dtype=np.float64)
+        # Rows without an account share one extra group and get NaN features, as a groupby would leave them.
+        missing = codes < 0
+        codes[missing] = n_accounts
 
-        data = data.join(agg_stats, on="nameOrig")
+        # Per-account results are broadcast back by code instead of joined on the key.
+        stats = group_stats(codes, amount, n_accounts + 1)
+        for name, stat in zip(AGGREGATE_COLUMNS, stats):
+            data[name] = np.where(missing, np.nan, stat[codes]) if missing.any() else stat[codes]
 
         data["z_score"] = (data["amount"] - data["avg_amount"]) / data["std_amount"].replace(0, np.nan)
 
-        data['daily_velocity_count'] = data.groupby(['nameOrig', 'day'])['amount'].transform('count')
+        velocity = bucket_counts(codes, data["day"].to_numpy())
+        data['daily_velocity_count'] = np.where(missing, np.nan, velocity) if missing.any() else velocity
 
         data['errorBalanceOrig'] = data['newbalanceOrig'] + data['amount'] - data['oldbalanceOrg']
 
-        return data
\ No newline at end of file
+        if self.velocity_windows:
+            windows = window_velocity(codes, data["step"].to_numpy(), amount, self.velocity_windows)
+            for name, values in windows.items():
+                data[name] = np.where(missing, np.nan, values) if missing.any() else values
+
+        if self.graph:
+            data = GraphFeatureBuilder().built_feature(data)
+
+        return data
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from src.FeatureBuilder.feature_builder import group_stats
+
+
+# Per-day counts are keyed by day and account code packed into one int64, day first, so
+# the keys of a new day sort after every stored key.
+CODE_BITS = 32
+
+
+class FeatureState:
+    """Running per-customer aggregates, so a new batch is featurized without rereading history.
+
+    Holds count, sum, sum of squared deviations (Welford's M2) and max per account, plus the
+    number of transactions per (account, day). `update` merges a batch into the state and
+    returns that batch with the same feature columns `FeatureBuilder.built_feature` adds,
+    computed over everything seen so far.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.size = 0
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.maximum = np.zeros(0)
+        self.n_day_keys = 0
+        self.day_keys = np.zeros(0, dtype=np.int64)
+        self.day_counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def update(self, batch):
+        if batch is None or batch.empty:
+            raise ValueError("Dataframe is empty or None!")
+
+        features = self.update_columns(batch["nameOrig"], batch["step"].to_numpy(), batch["amount"].to_numpy(),
+                                       batch["oldbalanceOrg"].to_numpy(), batch["newbalanceOrig"].to_numpy())
+        for col, values in features.items():
+            batch[col] = values
+        return batch
+
+    def update_columns(self, names, step, amount, oldbalance, newbalance):
+        """`update` on plain arrays, returning the feature columns as a dict of arrays.
+
+        Skips building a DataFrame, which dominates the cost of one-row batches.
+        """
+        day = np.ceil(np.asarray(step) / 24).astype(np.int32)
+
+        local_codes, accounts = pd.factorize(names)
+        if (local_codes < 0).any():
+            raise ValueError("Batch contains transactions without nameOrig; clean the data first!")
+        codes = self._account_codes(accounts)[local_codes]
+
+        amount = np.asarray(amount, dtype=np.float64)
+        self._merge_amounts(codes, amount, len(accounts), local_codes)
+        velocity = self._merge_days(codes, day)
+
+        count = self.count[codes]
+        total = self.total[codes]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            std = np.sqrt(self.m2[codes] / (count - 1))
+            std[count < 2] = np.nan
+            z_score = (amount - mean) / np.where(std == 0, np.nan, std)
+
+        return {
+            "day": day,
+            "count_transaction": count,
+            "total_amount": total,
+            "avg_amount": mean,
+            "max_amount": self.maximum[codes],
+            "std_amount": std,
+            "z_score": z_score,
+            "daily_velocity_count": velocity,
+            "errorBalanceOrig": np.asarray(newbalance) + amount - np.asarray(oldbalance),
+        }
+
+    def save(self, path):
+        np.savez(path, accounts=np.array(list(self.index), dtype=str),
+                 count=self.count[:self.size], total=self.total[:self.size],
+                 m2=self.m2[:self.size], maximum=self.maximum[:self.size],
+                 day_keys=self.day_keys[:self.n_day_keys], day_counts=self.day_counts[:self.n_day_keys],
+                 day_first=True)
+
+    @classmethod
+    def load(cls, path):
+        state = cls()
+        with np.load(path) as stored:
+            state.index = {account: code for code, account in enumerate(stored["accounts"].tolist())}
+            state.size = len(state.index)
+            state.count = stored["count"]
+            state.total = stored["total"]
+            state.m2 = stored["m2"]
+            state.maximum = stored["maximum"]
+            state.day_keys = stored["day_keys"]
+            state.day_counts = stored["day_counts"]
+            if "day_first" not in stored:
+                # Saved with the account code in the high bits; repack and re-sort day first.
+                mask = np.int64((1 << CODE_BITS) - 1)
+                keys = ((state.day_keys & mask) << CODE_BITS) | (state.day_keys >> CODE_BITS)
+                order = np.argsort(keys, kind="stable")
+                state.day_keys, state.day_counts = keys[order], state.day_counts[order]
+            state.n_day_keys = len(state.day_keys)
+        return state
+
+    def _account_codes(self, accounts):
+        """State code for each account of the batch, registering the ones seen for the first time."""
+        codes = np.empty(len(accounts), dtype=np.intp)
+        for i, account in enumerate(accounts):
+            code = self.index.get(account)
+            if code is None:
+                code = self.index[account] = self.size
+                self.size += 1
+            codes[i] = code
+        self._reserve(self.size)
+        return codes
+
+    def _reserve(self, size):
+        if size <= len(self.count):
+            return
+        # Grow geometrically so appending new customers stays amortized O(batch).
+        capacity = max(size, 2 * len(self.count), 1024)
+        extra = capacity - len(self.count)
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.total = np.concatenate([self.total, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.maximum = np.concatenate([self.maximum, np.full(extra, -np.inf)])
+
+    def _merge_amounts(self, codes, amount, n_local, local_codes):
+        count_b, total_b, mean_b, max_b, std_b = group_stats(local_codes, amount, n_local)
+        m2_b = np.where(count_b > 1, std_b * std_b * (count_b - 1), 0.0)
+
+        touched = np.empty(n_local, dtype=np.intp)
+        touched[local_codes] = codes
+        count_a = self.count[touched]
+        total_a = self.total[touched]
+        count = count_a + count_b
+        # Chan et al. pairwise merge of the running M2 with the batch M2.
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean_b - np.where(count_a > 0, total_a / count_a, 0.0)
+            m2 = self.m2[touched] + m2_b + delta * delta * count_a * count_b / count
+
+        self.count[touched] = count
+        self.total[touched] = total_a + total_b
+        self.m2[touched] = m2
+        self.maximum[touched] = np.maximum(self.maximum[touched], max_b)
+
+    def _merge_days(self, codes, days):
+        """Add the batch to the per-(day, account) counts and return the updated count per row.
+
+        Only the stored keys from the batch's smallest key onwards can interleave with the
+        batch, so only that tail is searched and merged with the new keys; for batches in
+        time order it is the current day, not the whole history.
+        """
+        keys = (days.astype(np.int64) << CODE_BITS) | codes.astype(np.int64)
+        batch_keys, key_codes = np.unique(keys, return_inverse=True)
+        batch_counts = np.bincount(key_codes)
+
+        size = self.n_day_keys
+        start = int(np.searchsorted(self.day_keys[:size], batch_keys[0]))
+        tail_keys = self.day_keys[start:size]
+        position = np.searchsorted(tail_keys, batch_keys)
+        found = position < len(tail_keys)
+        found[found] = tail_keys[position[found]] == batch_keys[found]
+        self.day_counts[start + position[found]] += batch_counts[found]
+
+        added = ~found
+        n_added = int(np.count_nonzero(added))
+        if n_added:
+            # Slot of each new key in the merged tail: its insertion point, shifted by the new keys before it.
+            slots = position[added] + np.arange(n_added)
+            is_added = np.zeros(len(tail_keys) + n_added, dtype=bool)
+            is_added[slots] = True
+            merged_keys = np.empty(len(is_added), dtype=np.int64)
+            merged_counts = np.empty(len(is_added), dtype=np.int64)
+            merged_keys[slots], merged_counts[slots] = batch_keys[added], batch_counts[added]
+            merged_keys[~is_added], merged_counts[~is_added] = tail_keys, self.day_counts[start:size]
+
+            self._reserve_days(size + n_added)
+            self.day_keys[start:size + n_added] = merged_keys
+            self.day_counts[start:size + n_added] = merged_counts
+            self.n_day_keys = size = size + n_added
+
+        return self.day_counts[start + np.searchsorted(self.day_keys[start:size], keys)]
+
+    def _reserve_days(self, size):
+        if size <= len(self.day_keys):
+            return
+        # Geometric growth, like _reserve, so appending keys never copies all history each batch.
+        capacity = max(size, 2 * len(self.day_keys), 1024)
+        extra = capacity - len(self.day_keys)
+        self.day_keys = np.concatenate([self.day_keys, np.zeros(extra, dtype=np.int64)])
+        self.day_counts = np.concatenate([self.day_counts, np.zeros(extra, dtype=np.int64)])
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+
+GRAPH_COLUMNS = [
+    "orig_in_degree", "orig_unique_counterparties", "dest_in_degree",
+    "dest_out_degree", "dest_fan_in_2hop", "errorBalanceDest",
+]
+
+
+def shared_account_codes(orig, dest):
+    """Codes for nameOrig and nameDest in one account space, so a customer is one node on both sides."""
+    orig_codes, orig_accounts = pd.factorize(orig)
+    dest_codes, dest_accounts = pd.factorize(dest)
+    accounts = pd.Index(orig_accounts).append(pd.Index(dest_accounts))
+    # Translate each side's local codes to codes over the union of both account lists.
+    union_codes, union = pd.factorize(accounts)
+    orig_map, dest_map = union_codes[:len(orig_accounts)], union_codes[len(orig_accounts):]
+    orig_codes = np.where(orig_codes < 0, -1, orig_map[orig_codes])
+    dest_codes = np.where(dest_codes < 0, -1, dest_map[dest_codes])
+    return orig_codes.astype(np.intp), dest_codes.astype(np.intp), len(union)
+
+
+def distinct(keys):
+    """Sorted distinct values of an int64 array.
+
+    A sort and a neighbour comparison; np.unique's hash table is several times slower on
+    millions of integer keys.
+    """
+    keys = np.sort(keys)
+    if len(keys) == 0:
+        return keys
+    keep = np.empty(len(keys), dtype=bool)
+    keep[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+    return keys[keep]
+
+
+class AccountGraph:
+    """Origin -> destination transfers as a CSR adjacency index over integer account codes.
+
+    `indptr[a]:indptr[a + 1]` slices the destinations of account `a` out of `indices`, and
+    the transposed index does the same for the senders into `a`. Both are plain NumPy
+    arrays, so memory is O(accounts + edges) with no per-node Python objects.
+    """
+
+    def __init__(self, indptr, indices, in_indptr, in_indices):
+        self.indptr = indptr
+        self.indices = indices
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+        self._senders = None
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @staticmethod
+    def _csr(source, target, n_accounts):
+        order = np.argsort(source, kind="stable")
+        indptr = np.zeros(n_accounts + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=n_accounts), out=indptr[1:])
+        return indptr, target[order].astype(np.int32 if n_accounts < 2 ** 31 else np.int64)
+
+    @classmethod
+    def from_edges(cls, orig_codes, dest_codes, n_accounts):
+        # Transfers with a missing side are not edges.
+        keep = (orig_codes >= 0) & (dest_codes >= 0)
+        if not keep.all():
+            orig_codes, dest_codes = orig_codes[keep], dest_codes[keep]
+        indptr, indices = cls._csr(orig_codes, dest_codes, n_accounts)
+        in_indptr, in_indices = cls._csr(dest_codes, orig_codes, n_accounts)
+        return cls(indptr, indices, in_indptr, in_indices)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.diff(self.in_indptr)
+
+    def unique_neighbors(self, indptr, indices):
+        """Distinct neighbours per account, counting repeated transfers to one counterparty once."""
+        source = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(indptr))
+        pairs = distinct(source * len(self) + indices)
+        return pairs // len(self), pairs % len(self)
+
+    def senders(self):
+        """(receiver, sender) for every distinct sender of every account, computed once."""
+        if self._senders is None:
+            self._senders = self.unique_neighbors(self.in_indptr, self.in_indices)
+        return self._senders
+
+    def unique_counterparties(self):
+        """Number of distinct accounts each account sent to or received from."""
+        out_src, out_dst = self.unique_neighbors(self.indptr, self.indices)
+        in_dst, in_src = self.senders()
+        n = len(self)
+        pairs = distinct(np.concatenate([out_src * n + out_dst, in_dst * n + in_src]))
+        return np.bincount(pairs // n, minlength=n)
+
+    def fan_in_2hop(self):
+        """Transfers that reached each account's distinct senders: how much money funnels in two hops."""
+        receiver, sender = self.senders()
+        return np.bincount(receiver, weights=self.in_degree()[sender], minlength=len(self)).astype(np.int64)
+
+
+class GraphFeatureBuilder:
+    """Destination-side and account-graph features, from one graph over all transfers.
+
+    Degrees and fan-in are properties of the whole graph, so this stage must see every row
+    at once; the parallel pipeline runs it in the parent after the sharded features.
+    """
+
+    REQUIRED_COLUMNS = ["nameOrig", "nameDest", "amount", "oldbalanceDest", "newbalanceDest"]
+
+    def required_columns(self):
+        return list(self.REQUIRED_COLUMNS)
+
+    def produced_columns(self):
+        return list(GRAPH_COLUMNS)
+
+    def built_feature(self, data):
+        if data is None or data.empty:
+            raise ValueError("Dataframe is empty or None!")
+
+        orig, dest, n_accounts = shared_account_codes(data["nameOrig"], data["nameDest"])
+        graph = AccountGraph.from_edges(orig, dest, n_accounts)
+        in_degree = graph.in_degree()
+
+        per_orig = {
+            "orig_in_degree": in_degree,
+            "orig_unique_counterparties": graph.unique_counterparties(),
+        }
+        per_dest = {
+            "dest_in_degree": in_degree,
+            "dest_out_degree": graph.out_degree(),
+            "dest_fan_in_2hop": graph.fan_in_2hop(),
+        }
+        for codes, features in ((orig, per_orig), (dest, per_dest)):
+            missing = codes < 0
+            for name, values in features.items():
+                data[name] = np.where(missing, np.nan, values[codes]) if missing.any() else values[codes]
+
+        data["errorBalanceDest"] = data["oldbalanceDest"] + data["amount"] - data["newbalanceDest"]
+        return data
@@ -1,39 +1,115 @@
 import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from model.reports.report import Report
-from .pdf_report import PDFReportGenerator
+from model.reports.report_metrics import ReportMetrics
+from .report_exporter import ReportExporter
 
 
 class GenerateReports:
-    def __init__(self, output_dir="Reports"):
+    # Identify each row of the flagged-transactions table, next to its score columns.
+    TRANSACTION_COLUMNS = ["step", "type", "amount", "nameOrig", "nameDest"]
+
+    def __init__(self, output_dir="Reports", chart_dpi=300, chart_format="png", histogram_bins=30, log_bins=False,
+                 export_format="csv", compression=None, chunksize=100_000, partition_by=None, customer_index=True,
+                 table_columns=None):
         self.output_dir = output_dir
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-        self.re=Report(output_dir=self.output_dir)
-        self.pdf_generator = PDFReportGenerator(output_dir=self.output_dir)
+        self.exporter = ReportExporter(output_dir=output_dir, export_format=export_format, compression=compression,
+                                       chunksize=chunksize, partition_by=partition_by)
+        self.histogram_bins = histogram_bins
+        self.log_bins = log_bins
+        self.chart_dpi = chart_dpi
+        self.chart_format = chart_format
+        self.partition_by = partition_by
+        # Folder under output_dir for the per-customer lookup index; False skips it.
+        self.customer_index = "customer_index" if customer_index is True else customer_index
+        # Columns the flagged-transactions table keeps; None keeps every column of the data.
+        # The index needs every feature column, and this keeps them out of the exports.
+        self.table_columns = None if table_columns is None else list(table_columns)
+        self._re = None
+        self._pdf_generator = None
+
+    def required_columns(self):
+        columns = list(self.TRANSACTION_COLUMNS) + ReportMetrics.INPUT_COLUMNS + list(self.partition_by or [])
+        if self.customer_index:
+            # The index keeps each customer's full history: transaction fields, features and scores.
+            from src.DataManager.schema import TRANSACTION_SCHEMA
+            from src.FeatureBuilder.feature_builder import FeatureBuilder
+            from src.RiskScore.risk_score import RiskScorer
+            columns += list(TRANSACTION_SCHEMA) + FeatureBuilder().produced_columns() \
+                + RiskScorer().produced_columns(keep_zscores=False)
+        return list(dict.fromkeys(columns))
+
+    def produced_columns(self):
+        return []
 
+    @property
+    def re(self):
+        if self._re is None:
+            self._re = Report(output_dir=self.output_dir)
+        return self._re
+
+    @property
+    def pdf_generator(self):
+        # Imported here because pdf_report pulls in matplotlib and reportlab.
+        if self._pdf_generator is None:
+            from .pdf_report import PDFReportGenerator
+            self._pdf_generator = PDFReportGenerator(output_dir=self.output_dir, dpi=self.chart_dpi,
+                                                     image_format=self.chart_format)
+        return self._pdf_generator
 
 
     def generate_reports(self, data):
         if data is not None:
-            flagged_path = os.path.join(self.output_dir, 'flagged_transactions.csv')
-            customer_summary_path = os.path.join(self.output_dir, 'customer_risk_summary.csv')
+            # Computed once and shared by every output below.
+            metrics = ReportMetrics.for_data(data, bins=self.histogram_bins, log_bins=self.log_bins)
+
+            flagged = metrics.flagged(data)
+            if self.table_columns is not None:
+                flagged = flagged[[col for col in flagged.columns if col in self.table_columns]]
+            self.write_reports(metrics, {
+                "flagged_transactions": flagged,
+                "customer_risk_summary": self.customer_summary(data, chunksize=self.exporter.chunksize),
+            }, data=data)
+        else:
+            print("❌ Not exist Data please Load the data first!\n")
 
-            flagged = data[data["is_suspicious"] == True]
-            flagged.to_csv(flagged_path, index=False)
+    @staticmethod
+    def customer_summary(data, chunksize=100_000):
+        """Highest score and latest band of each customer.
 
-            customer_summary = data.groupby("nameOrig").agg({
-                "final_risk_score": "max",
-                "risk_band": "last"
-            }).reset_index()
-            customer_summary.to_csv(customer_summary_path, index=False)
+        Aggregated `chunksize` rows at a time and then across the per-chunk results, so the
+        grouping buffers scale with the chunk rather than with the whole frame. Both steps
+        are exact: a max of maxes, and the last non-null band of the last chunk that has one.
+        """
+        aggregations = {"final_risk_score": "max", "risk_band": "last"}
+        columns = ["nameOrig", *aggregations]
+        if len(data) <= chunksize:
+            return data[columns].groupby("nameOrig", observed=True).agg(aggregations).reset_index()
+        partials = [data.iloc[start:start + chunksize][columns].groupby("nameOrig", observed=True).agg(aggregations)
+                    for start in range(0, len(data), chunksize)]
+        return pd.concat(partials).groupby(level="nameOrig", observed=True).agg(aggregations).reset_index()
 
+    def write_reports(self, metrics, tables, data=None):
+        """Write the TXT and PDF reports from `metrics` and export `tables`; the scored frame
+        `data` is only needed for the customer index, which is skipped without it."""
+        os.makedirs(self.output_dir, exist_ok=True)
 
-            self.re.report_txt(data)
-            
-            
-            self.pdf_generator.generate_pdf(data)
+        # The tables are written in the background while the TXT and PDF reports are built.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            exported = pool.submit(self.exporter.export, tables)
 
+            self.re.report_txt(None, metrics)
 
-            print(f"✅ Reports saved in folder: {self.output_dir}")
-        else:
-            print("❌ Not exist Data please Load the data first!\n")
\ No newline at end of file
+            self.pdf_generator.generate_pdf(None, metrics)
+
+            # Built here once the PDF is done, rather than on a pool thread that could be alive during a fork.
+            if data is not None and self.customer_index:
+                from src.CustomerIndex.customer_index import CustomerIndex
+                index_dir = os.path.join(self.output_dir, self.customer_index)
+                index = CustomerIndex.build(data, index_dir)
+                print(f"🔎 Customer index of {len(index):,} customers saved in: {index_dir}")
+
+            exported.result()
+
+        print(f"✅ Reports saved in folder: {self.output_dir}")
\ No newline at end of file
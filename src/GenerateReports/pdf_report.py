@@ -1,119 +1,164 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
 from datetime import datetime
-import matplotlib.pyplot as plt
 import matplotlib
-from reportlab.lib.pagesizes import letter, A4
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle
 from reportlab.lib import colors
 from io import BytesIO
-import pandas as pd
+from model.reports.report_metrics import ReportMetrics
+from .report_exporter import atomic_path
+
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:
+    svg2rlg = None
+
+
+def draw_risk_distribution(ax, bands, counts):
+    colors_map = {'Low': '#2ecc71', 'Medium': '#f39c12', 'High': '#e74c3c'}
+    chart_colors = [colors_map.get(band, '#95a5a6') for band in bands]
+
+    ax.pie(counts, labels=bands, autopct='%1.1f%%',
+           colors=chart_colors, startangle=90, textprops={'fontsize': 11, 'weight': 'bold'})
+    ax.set_title('Risk Band Distribution', fontsize=14, weight='bold', pad=20)
+
+
+def draw_flagged_transactions(ax, normal_count, flagged_count):
+    categories = ['Normal', 'Flagged']
+    counts = [normal_count, flagged_count]
+    bar_colors = ['#2ecc71', '#e74c3c']
+
+    bars = ax.bar(categories, counts, color=bar_colors, edgecolor='black', linewidth=1.5)
+    ax.set_ylabel('Transaction Count', fontsize=12, weight='bold')
+    ax.set_title('Normal vs Flagged Transactions', fontsize=14, weight='bold', pad=20)
 
-matplotlib.use('Agg')  
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+               f'{int(height):,}',
+               ha='center', va='bottom', fontsize=11, weight='bold')
+
+
+def draw_top_customers(ax, customers, scores):
+    ax.barh(range(len(customers)), scores,
+           color='#e74c3c', edgecolor='black', linewidth=1)
+    ax.set_yticks(range(len(customers)))
+    ax.set_yticklabels(customers, fontsize=9)
+    ax.set_xlabel('Risk Score', fontsize=12, weight='bold')
+    ax.set_title('Top 10 Customers by Risk Score', fontsize=14, weight='bold', pad=20)
+    ax.invert_yaxis()
+
+    for i, v in enumerate(scores):
+        ax.text(v + 0.1, i, f'{v:.2f}', va='center', fontsize=9, weight='bold')
+
+
+def draw_transaction_amount(ax, edges, normal_counts, flagged_counts, log_scale=False):
+    # Pre-binned counts drawn as one weighted sample per bin look exactly like hist() on the raw amounts.
+    ax.hist([edges[:-1], edges[:-1]], bins=edges, weights=[normal_counts, flagged_counts],
+           label=['Normal', 'Flagged'], color=['#2ecc71', '#e74c3c'], edgecolor='black', alpha=0.7)
+    if log_scale:
+        ax.set_xscale('log')
+    ax.set_xlabel('Transaction Amount', fontsize=12, weight='bold')
+    ax.set_ylabel('Frequency', fontsize=12, weight='bold')
+    ax.set_title('Transaction Amount Distribution', fontsize=14, weight='bold', pad=20)
+    ax.legend(fontsize=11)
+    ax.grid(True, alpha=0.3)
+
+
+def render_chart(draw, figsize, args, image_format="png", dpi=300):
+    """Draw one chart and return the encoded image bytes; runs in pool workers too."""
+    fig, ax = plt.subplots(figsize=figsize)
+    draw(ax, *args)
+    buffer = BytesIO()
+    fig.savefig(buffer, format=image_format, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
 
 
 class PDFReportGenerator:
     """Generate comprehensive PDF reports with visualizations for transaction analysis."""
     
-    def __init__(self, output_dir="Reports"):
+    def __init__(self, output_dir="Reports", dpi=300, image_format="png", workers=None):
         self.output_dir = output_dir
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir, exist_ok=True)
         self.pdf_path = os.path.join(self.output_dir, "Transaction_Risk_Analysis_Report.pdf")
-        self.charts_dir = os.path.join(self.output_dir, "charts_temp")
-        if not os.path.exists(self.charts_dir):
-            os.makedirs(self.charts_dir, exist_ok=True)
+        if image_format not in ("png", "svg"):
+            raise ValueError("image_format must be 'png' or 'svg'!")
+        if image_format == "svg" and svg2rlg is None:
+            raise ValueError("Vector charts need the svglib package: pip install svglib")
+        self.dpi = dpi
+        self.image_format = image_format
+        self.workers = min(4, os.cpu_count() or 1) if workers is None else workers
     
-    def create_risk_distribution_chart(self, data):
-        """Create risk band distribution pie chart."""
-        fig, ax = plt.subplots(figsize=(8, 6))
-        risk_dist = data['risk_band'].value_counts()
-        colors_map = {'Low': '#2ecc71', 'Medium': '#f39c12', 'High': '#e74c3c'}
-        chart_colors = [colors_map.get(band, '#95a5a6') for band in risk_dist.index]
-        
-        ax.pie(risk_dist.values, labels=risk_dist.index, autopct='%1.1f%%',
-               colors=chart_colors, startangle=90, textprops={'fontsize': 11, 'weight': 'bold'})
-        ax.set_title('Risk Band Distribution', fontsize=14, weight='bold', pad=20)
-        
-        chart_path = os.path.join(self.charts_dir, "risk_distribution.png")
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        return chart_path
+    def create_risk_distribution_chart(self, metrics):
+        """Chart spec for the risk band distribution pie chart."""
+        risk_dist = metrics.band_counts
+        return draw_risk_distribution, (8, 6), ([str(band) for band in risk_dist.index], risk_dist.tolist())
     
-    def create_flagged_transactions_chart(self, data):
-        """Create flagged vs normal transactions bar chart."""
-        fig, ax = plt.subplots(figsize=(8, 6))
-        flagged_count = len(data[data['is_suspicious'] == True])
-        normal_count = len(data[data['is_suspicious'] == False])
-        
-        categories = ['Normal', 'Flagged']
-        counts = [normal_count, flagged_count]
-        bar_colors = ['#2ecc71', '#e74c3c']
-        
-        bars = ax.bar(categories, counts, color=bar_colors, edgecolor='black', linewidth=1.5)
-        ax.set_ylabel('Transaction Count', fontsize=12, weight='bold')
-        ax.set_title('Normal vs Flagged Transactions', fontsize=14, weight='bold', pad=20)
-        
-       
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{int(height):,}',
-                   ha='center', va='bottom', fontsize=11, weight='bold')
-        
-        chart_path = os.path.join(self.charts_dir, "flagged_transactions.png")
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        return chart_path
+    def create_flagged_transactions_chart(self, metrics):
+        """Chart spec for the flagged vs normal transactions bar chart."""
+        return draw_flagged_transactions, (8, 6), (metrics.normal_count, metrics.flagged_count)
     
-    def create_top_customers_chart(self, data):
-        """Create top 10 customers by risk score bar chart."""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        top_customers = data.nlargest(10, 'final_risk_score')[['nameOrig', 'final_risk_score']]
-        
-        ax.barh(range(len(top_customers)), top_customers['final_risk_score'].values, 
-               color='#e74c3c', edgecolor='black', linewidth=1)
-        ax.set_yticks(range(len(top_customers)))
-        ax.set_yticklabels(top_customers['nameOrig'].values, fontsize=9)
-        ax.set_xlabel('Risk Score', fontsize=12, weight='bold')
-        ax.set_title('Top 10 Customers by Risk Score', fontsize=14, weight='bold', pad=20)
-        ax.invert_yaxis()
-        
-       
-        for i, v in enumerate(top_customers['final_risk_score'].values):
-            ax.text(v + 0.1, i, f'{v:.2f}', va='center', fontsize=9, weight='bold')
-        
-        chart_path = os.path.join(self.charts_dir, "top_customers.png")
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        return chart_path
+    def create_top_customers_chart(self, metrics):
+        """Chart spec for the top 10 customers by risk score bar chart."""
+        top_customers = metrics.top_risky.head(10)
+        return draw_top_customers, (10, 6), ([str(name) for name in top_customers['nameOrig']],
+                                             top_customers['final_risk_score'].tolist())
     
-    def create_transaction_amount_chart(self, data):
-        """Create transaction amount distribution chart."""
-        fig, ax = plt.subplots(figsize=(8, 6))
-        
-        flagged = data[data['is_suspicious'] == True]['amount']
-        normal = data[data['is_suspicious'] == False]['amount']
-        
-        ax.hist([normal, flagged], bins=30, label=['Normal', 'Flagged'], 
-               color=['#2ecc71', '#e74c3c'], edgecolor='black', alpha=0.7)
-        ax.set_xlabel('Transaction Amount', fontsize=12, weight='bold')
-        ax.set_ylabel('Frequency', fontsize=12, weight='bold')
-        ax.set_title('Transaction Amount Distribution', fontsize=14, weight='bold', pad=20)
-        ax.legend(fontsize=11)
-        ax.grid(True, alpha=0.3)
-        
-        chart_path = os.path.join(self.charts_dir, "transaction_amount.png")
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        return chart_path
+    def create_transaction_amount_chart(self, metrics):
+        """Chart spec for the transaction amount distribution chart."""
+        return draw_transaction_amount, (8, 6), (metrics.amount_edges, metrics.normal_amount_counts,
+                                                 metrics.flagged_amount_counts, metrics.log_bins)
+
+    def render_charts(self, specs):
+        """Render {name: chart spec} concurrently and return {name: image bytes}.
+
+        The workers come from a forkserver that has imported this module, so each one starts
+        with matplotlib loaded and forks from a process without the caller's threads. Where
+        there is no forkserver (Windows), a spawned worker would spend longer importing
+        matplotlib than drawing its chart, so the charts are rendered here one by one.
+        """
+        if self.workers <= 1 or len(specs) == 1 or "forkserver" not in mp.get_all_start_methods():
+            return {name: render_chart(*spec, self.image_format, self.dpi) for name, spec in specs.items()}
+
+        context = mp.get_context("forkserver")
+        # Only takes effect when the server starts, so the first pool of the process decides it.
+        context.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(specs)), mp_context=context) as pool:
+            futures = {name: pool.submit(render_chart, *spec, self.image_format, self.dpi)
+                       for name, spec in specs.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def chart_flowable(self, image, width, height):
+        """Wrap rendered chart bytes for the story without touching the filesystem."""
+        if self.image_format == "svg":
+            drawing = svg2rlg(BytesIO(image))
+            drawing.scale(width / drawing.width, height / drawing.height)
+            drawing.width, drawing.height = width, height
+            return drawing
+        return Image(BytesIO(image), width=width, height=height)
     
-    def generate_pdf(self, data):
+    def generate_pdf(self, data, metrics=None):
         """Generate comprehensive PDF report with all visualizations."""
-        if data is None or len(data) == 0:
-            print("❌ No data available for PDF generation!")
-            return None
+        if metrics is None:
+            if data is None or len(data) == 0:
+                print("❌ No data available for PDF generation!")
+                return None
+            metrics = ReportMetrics.for_data(data)
+
+        charts = self.render_charts({
+            "risk": self.create_risk_distribution_chart(metrics),
+            "flagged": self.create_flagged_transactions_chart(metrics),
+            "amount": self.create_transaction_amount_chart(metrics),
+            "customers": self.create_top_customers_chart(metrics),
+        })
         
       
         doc = SimpleDocTemplate(self.pdf_path, pagesize=letter,
@@ -150,24 +195,23 @@ class PDFReportGenerator:
         
         
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        meta_text = f"<b>Generated On:</b> {timestamp} | <b>Total Transactions:</b> {len(data):,}"
+        meta_text = f"<b>Generated On:</b> {timestamp} | <b>Total Transactions:</b> {metrics.total:,}"
         story.append(Paragraph(meta_text, styles['Normal']))
         story.append(Spacer(1, 0.2*inch))
         
      
-        flagged = data[data['is_suspicious'] == True]
-        total_flagged = len(flagged)
-        flagged_pct = (total_flagged / len(data) * 100) if len(data) else 0
+        total_flagged = metrics.flagged_count
+        flagged_pct = metrics.flagged_pct
         
         story.append(Paragraph("Executive Summary", heading_style))
         
         summary_text = f"""
-        This report analyzes <b>{len(data):,} transactions</b> for potential fraudulent behavior 
+        This report analyzes <b>{metrics.total:,} transactions</b> for potential fraudulent behavior 
         using risk scoring and classification.<br/><br/>
         <b>Key Findings:</b><br/>
         • Total Flagged Transactions: <b>{total_flagged:,}</b> ({flagged_pct:.2f}%)<br/>
-        • Average Risk Score: <b>{data['final_risk_score'].mean():.2f}</b><br/>
-        • Highest Risk Score: <b>{data['final_risk_score'].max():.2f}</b><br/>
+        • Average Risk Score: <b>{metrics.mean_score:.2f}</b><br/>
+        • Highest Risk Score: <b>{metrics.max_score:.2f}</b><br/>
         • Risk Status: <b>{'HIGH' if flagged_pct > 5 else 'MEDIUM' if flagged_pct > 2 else 'LOW'}</b>
         """
         story.append(Paragraph(summary_text, styles['Normal']))
@@ -175,8 +219,7 @@ class PDFReportGenerator:
         
        
         story.append(Paragraph("Risk Band Distribution", heading_style))
-        risk_chart = self.create_risk_distribution_chart(data)
-        story.append(Image(risk_chart, width=5*inch, height=3.75*inch))
+        story.append(self.chart_flowable(charts["risk"], 5*inch, 3.75*inch))
         story.append(Spacer(1, 0.2*inch))
         
         
@@ -184,28 +227,25 @@ class PDFReportGenerator:
         
      
         story.append(Paragraph("Transaction Classification", heading_style))
-        flagged_chart = self.create_flagged_transactions_chart(data)
-        story.append(Image(flagged_chart, width=5*inch, height=3.75*inch))
+        story.append(self.chart_flowable(charts["flagged"], 5*inch, 3.75*inch))
         story.append(Spacer(1, 0.3*inch))
         
       
         story.append(Paragraph("Transaction Amount Distribution", heading_style))
-        amount_chart = self.create_transaction_amount_chart(data)
-        story.append(Image(amount_chart, width=5*inch, height=3.75*inch))
+        story.append(self.chart_flowable(charts["amount"], 5*inch, 3.75*inch))
         
     
         story.append(PageBreak())
         
        
         story.append(Paragraph("High-Risk Customers", heading_style))
-        customers_chart = self.create_top_customers_chart(data)
-        story.append(Image(customers_chart, width=6*inch, height=4.5*inch))
+        story.append(self.chart_flowable(charts["customers"], 6*inch, 4.5*inch))
         story.append(Spacer(1, 0.3*inch))
         
       
         story.append(Paragraph("Risk Band Summary", heading_style))
-        risk_summary = data['risk_band'].value_counts().to_frame()
-        risk_summary['Percentage'] = (risk_summary['count'] / len(data) * 100).round(2)
+        risk_summary = metrics.band_counts.to_frame()
+        risk_summary['Percentage'] = (risk_summary['count'] / metrics.total * 100).round(2)
         
         table_data = [['Risk Band', 'Count', 'Percentage']]
         for idx, row in risk_summary.iterrows():
@@ -227,15 +267,8 @@ class PDFReportGenerator:
         story.append(table)
         
     
-        doc.build(story)
-        
-        
-
-        self._cleanup_charts()
+        with atomic_path(self.pdf_path) as pdf_tmp_path:
+            # reportlab writes the file as it lays out pages, so build into the temp path.
+            doc.filename = pdf_tmp_path
+            doc.build(story)
         return self.pdf_path
-    
-    def _cleanup_charts(self):
-        """Remove temporary chart files."""
-        import shutil
-        if os.path.exists(self.charts_dir):
-            shutil.rmtree(self.charts_dir)
@@ -0,0 +1,126 @@
+import io
+import os
+import gzip
+import shutil
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # zstd output is optional
+    zstandard = None
+
+
+EXPORT_FORMATS = ("csv", "parquet")
+COMPRESSIONS = (None, "gzip", "zstd")
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temporary sibling of `path` to write to, renamed over `path` only on success.
+
+    Works for files and directories, so readers see either the old output or the complete
+    new one, never a half-written file.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        yield tmp_path
+        if os.path.isdir(tmp_path) and os.path.isdir(path):
+            # Directories cannot be replaced in one rename; move the old one aside first.
+            old_path = f"{tmp_path}.old"
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ReportExporter:
+    """Writes report tables in chunks, as (optionally compressed) CSV or as Parquet.
+
+    Every table is written to a temporary path and renamed into place when complete, and
+    `export` writes independent tables concurrently on a thread pool: pandas and pyarrow
+    release the GIL for most of the encoding and compression work.
+    """
+
+    def __init__(self, output_dir="Reports", export_format="csv", compression=None,
+                 chunksize=100_000, partition_by=None, workers=2):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"export_format must be one of: {', '.join(EXPORT_FORMATS)}!")
+        if compression not in COMPRESSIONS:
+            raise ValueError("compression must be None, 'gzip' or 'zstd'!")
+        if export_format == "csv" and compression == "zstd" and zstandard is None:
+            raise ValueError("zstd CSV output needs the 'zstandard' package: pip install zstandard")
+        if chunksize is None or chunksize <= 0:
+            raise ValueError("chunksize must be a positive number of rows!")
+        self.output_dir = output_dir
+        self.export_format = export_format
+        self.compression = compression
+        self.chunksize = chunksize
+        self.partition_by = list(partition_by or [])
+        self.workers = workers
+
+    def export(self, tables):
+        """Write each `{name: frame}` table and return `{name: path}`."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.workers <= 1 or len(tables) <= 1:
+            return {name: self.write(name, frame) for name, frame in tables.items()}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(tables))) as pool:
+            futures = {name: pool.submit(self.write, name, frame) for name, frame in tables.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def write(self, name, frame):
+        if self.export_format == "parquet":
+            return self.write_parquet(name, frame)
+        return self.write_csv(name, frame)
+
+    def write_csv(self, name, frame):
+        path = os.path.join(self.output_dir, f"{name}.csv{EXTENSIONS[self.compression]}")
+        with atomic_path(path) as tmp_path:
+            with self._open(tmp_path) as f:
+                if frame.empty:
+                    frame.to_csv(f, index=False)
+                for start in range(0, len(frame), self.chunksize):
+                    frame.iloc[start:start + self.chunksize].to_csv(f, index=False, header=start == 0)
+        return path
+
+    def write_parquet(self, name, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        compression = {None: "none", "gzip": "gzip", "zstd": "zstd"}[self.compression]
+        partition_cols = [col for col in self.partition_by if col in frame.columns]
+
+        if partition_cols:
+            # A dataset directory with one subfolder per partition value, e.g. risk_band=High Risk/.
+            path = os.path.join(self.output_dir, name)
+            with atomic_path(path) as tmp_path:
+                pq.write_to_dataset(pa.Table.from_pandas(frame, preserve_index=False), tmp_path,
+                                    partition_cols=partition_cols, compression=compression,
+                                    row_group_size=self.chunksize)
+            return path
+
+        path = os.path.join(self.output_dir, f"{name}.parquet")
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        with atomic_path(path) as tmp_path:
+            with pq.ParquetWriter(tmp_path, schema, compression=compression) as writer:
+                for start in range(0, len(frame), self.chunksize):
+                    chunk = frame.iloc[start:start + self.chunksize]
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return path
+
+    def _open(self, path):
+        if self.compression == "gzip":
+            # compresslevel 6 is the usual speed/size trade-off; 9 is several times slower.
+            return io.TextIOWrapper(gzip.open(path, "wb", compresslevel=6), encoding="utf-8", newline="")
+        if self.compression == "zstd":
+            raw = open(path, "wb")
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+            return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        return open(path, "w", encoding="utf-8", newline="")
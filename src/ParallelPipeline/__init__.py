@@ -0,0 +1 @@
+from src.ParallelPipeline import parallel_pipeline
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.FeatureBuilder.feature_builder import FeatureBuilder, velocity_columns
+from src.FeatureBuilder.graph_features import GraphFeatureBuilder
+from src.RiskScore.risk_score import RiskScorer
+from src.RiskScore.risk_model import RiskModel
+from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+
+
+FEATURE_COLUMNS = [
+    "day", "count_transaction", "total_amount", "avg_amount", "max_amount",
+    "std_amount", "z_score", "daily_velocity_count", "errorBalanceOrig",
+] + velocity_columns()
+
+# Inputs handed to the pool through its initializer. Under fork the workers inherit them
+# from the parent's memory without copying; under spawn or forkserver the initializer
+# arguments are pickled once per worker.
+_shared = {}
+
+
+def pool_context():
+    """Fork where it exists, unless the program chose another start method; else the default.
+
+    Fork shares the parent's frames with the workers for free. Spawn (the only method on
+    Windows) and forkserver start fresh interpreters that import the `__main__` module, so
+    entry points must keep their work under an `if __name__ == "__main__":` guard.
+    """
+    method = mp.get_start_method(allow_none=True)
+    if method is None and "fork" in mp.get_all_start_methods():
+        method = "fork"
+    return mp.get_context(method)
+
+
+def _init_worker(shared):
+    _shared.clear()
+    _shared.update(shared)
+
+
+def _build_shard(rows):
+    builder = FeatureBuilder(graph=False)
+    data = _shared["data"]
+    # Only the columns the features read are copied into the shard.
+    shard = data.iloc[rows, data.columns.get_indexer(builder.required_columns())].copy()
+    shard = builder.built_feature(shard)
+    return {col: shard[col].to_numpy() for col in FEATURE_COLUMNS}
+
+
+def _block_moments(start):
+    scorer = _shared["scorer"]
+    return scorer.matrix_moments(_shared["matrix"][start:start + scorer.STATS_BLOCK_ROWS])
+
+
+def _score_shard(rows, model):
+    matrix = _shared["matrix"][rows]
+    scorer = _shared["scorer"]
+    scores = scorer.score_matrix(matrix, model.mean, model.std)
+    bands = scorer.assign_bands(scores, model.band_thresholds)
+    flags = TransactionFlagger().is_suspicious(pd.DataFrame({"risk_band": bands}))["is_suspicious"]
+    zscores = matrix if _shared["keep_zscores"] else None
+    return scores, zscores, bands.codes, flags.to_numpy()
+
+
+class ParallelPipeline:
+    """Features -> scores -> flags across a process pool, with the same output as the serial stages.
+
+    Rows are sharded by a hash of nameOrig, so every per-customer aggregate is computed
+    entirely inside one shard. The global steps run once in the parent between the two pool
+    passes: the graph features, which need every transfer, and merging the feature
+    means/stds the scorer normalizes with, skipped when a fitted `RiskModel` is given. The
+    workers reduce fixed row blocks of the feature matrix to count/mean/M2, the same blocks
+    `RiskScorer.feature_stats` uses, so only those moments come back to the parent.
+    """
+
+    def __init__(self, workers=None, scorer=None, keep_zscores=True, model=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.scorer = scorer or RiskScorer()
+        self.keep_zscores = keep_zscores
+        self.model = model
+
+    def run(self, data):
+        if data is None or data.empty:
+            raise ValueError("Dataframe is empty or None!")
+
+        if self.workers <= 1:
+            data = FeatureBuilder().built_feature(data)
+            data = self.scorer.compute_scores(data, keep_zscores=self.keep_zscores, model=self.model)
+            return TransactionFlagger().is_suspicious(data)
+
+        shards = self.partition(data)
+        context = pool_context()
+        if context.get_start_method() != "fork":
+            # Pickled to every worker, so only the columns the shard features read are sent.
+            source = data[FeatureBuilder(graph=False).required_columns()]
+        else:
+            source = data
+
+        with self._pool({"data": source}, context) as pool:
+            built = list(pool.map(_build_shard, shards))
+        for col in FEATURE_COLUMNS:
+            data[col] = self._gather(shards, [result[col] for result in built], len(data))
+        data = GraphFeatureBuilder().built_feature(data)
+
+        model = self.model
+        matrix = self.scorer.feature_matrix(data, None if model is None else model.features)
+        shared = {"matrix": matrix, "scorer": self.scorer, "keep_zscores": self.keep_zscores}
+        with self._pool(shared, context) as pool:
+            if model is None:
+                moments = list(pool.map(_block_moments, range(0, len(matrix), self.scorer.STATS_BLOCK_ROWS)))
+                mean, std = self.scorer.moments_stats(self.scorer.merge_moments(moments))
+                model = RiskModel(self.scorer.features, mean, std, self.scorer.band_thresholds, n_rows=len(matrix))
+            scored = list(pool.map(_score_shard, shards, [model] * len(shards)))
+
+        if self.keep_zscores:
+            zscores = self._gather(shards, [result[1] for result in scored], len(data))
+            for j, col in enumerate(model.features):
+                data[f"{col}_zscore"] = zscores[:, j]
+        data["final_risk_score"] = self._gather(shards, [result[0] for result in scored], len(data))
+        band_codes = self._gather(shards, [result[2] for result in scored], len(data))
+        data["risk_band"] = pd.Categorical.from_codes(band_codes, categories=self.scorer.BAND_LABELS, ordered=True)
+        data["is_suspicious"] = self._gather(shards, [result[3] for result in scored], len(data))
+        return data
+
+    def partition(self, data):
+        """Row positions of each shard, keeping every customer's rows in one shard and in order."""
+        hashes = pd.util.hash_pandas_object(data["nameOrig"], index=False).to_numpy()
+        shard_ids = hashes % np.uint64(self.workers)
+        order = np.argsort(shard_ids, kind="stable")
+        bounds = np.cumsum(np.bincount(shard_ids.astype(np.intp), minlength=self.workers))[:-1]
+        return [rows for rows in np.split(order, bounds) if len(rows)]
+
+    def _pool(self, shared, context):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(shared,))
+
+    @staticmethod
+    def _gather(shards, parts, n_rows):
+        out = np.empty((n_rows,) + parts[0].shape[1:], dtype=parts[0].dtype)
+        for rows, part in zip(shards, parts):
+            out[rows] = part
+        return out
@@ -0,0 +1,67 @@
+import os
+import json
+from datetime import datetime
+import numpy as np
+
+
+MODEL_FORMAT = 1
+
+
+class RiskModel:
+    """The fitted part of risk scoring: per-feature mean and std plus the band thresholds.
+
+    Small enough to store as JSON, so a batch run, the parallel pipeline and the streaming
+    scorer can all apply the statistics fitted once on the full history.
+    """
+
+    def __init__(self, features, mean, std, band_thresholds, n_rows=0, fitted_at=None):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.band_thresholds = tuple(float(t) for t in band_thresholds)
+        self.n_rows = int(n_rows)
+        self.fitted_at = fitted_at or datetime.now().isoformat(timespec="seconds")
+        if len(self.mean) != len(self.features) or len(self.std) != len(self.features):
+            raise ValueError("Model needs one mean and one std per feature!")
+
+    def to_dict(self):
+        return {
+            "format": MODEL_FORMAT,
+            "features": self.features,
+            # NaN (a feature that was never observed) is kept as null.
+            "mean": [None if np.isnan(v) else float(v) for v in self.mean],
+            "std": [None if np.isnan(v) else float(v) for v in self.std],
+            "band_thresholds": list(self.band_thresholds),
+            "n_rows": self.n_rows,
+            "fitted_at": self.fitted_at,
+        }
+
+    @classmethod
+    def from_dict(cls, stored):
+        if stored.get("format") != MODEL_FORMAT:
+            raise ValueError(f"Unsupported risk model format: {stored.get('format')}")
+        return cls(
+            features=stored["features"],
+            mean=[np.nan if v is None else v for v in stored["mean"]],
+            std=[np.nan if v is None else v for v in stored["std"]],
+            band_thresholds=stored["band_thresholds"],
+            n_rows=stored.get("n_rows", 0),
+            fitted_at=stored.get("fitted_at"),
+        )
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Risk model not found: {path}")
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -1,49 +1,182 @@
-from scipy.stats import norm
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from src.RiskScore.risk_model import RiskModel
 
 class RiskScorer:
 
+    BAND_LABELS = ["Low Risk", "Medium Risk", "High Risk", "Critical Risk"]
+    BAND_THRESHOLDS = (40, 70, 90)
+    SCORE_FEATURES = [
+        'count_transaction', 'avg_amount', 'total_amount',
+        'max_amount', 'daily_velocity_count', 'errorBalanceOrig',
+        'orig_in_degree', 'orig_unique_counterparties', 'dest_in_degree',
+        'dest_out_degree', 'dest_fan_in_2hop', 'errorBalanceDest'
+    ]
+    # The features that only look at the sending account, e.g. what FeatureState keeps.
+    ACCOUNT_FEATURES = SCORE_FEATURES[:6]
+    # Rows per block of feature_stats; fixed so the statistics never depend on the worker count.
+    STATS_BLOCK_ROWS = 1 << 16
 
-    def __init__(self):
-        pass
+    def __init__(self, band_thresholds=None, features=None):
+        thresholds = tuple(self.BAND_THRESHOLDS if band_thresholds is None else band_thresholds)
+        if len(thresholds) != len(self.BAND_LABELS) - 1 or list(thresholds) != sorted(set(thresholds)):
+            raise ValueError(f"Band thresholds must be {len(self.BAND_LABELS) - 1} strictly increasing values!")
+        self.band_thresholds = thresholds
+        self.features = list(self.SCORE_FEATURES if features is None else features)
+
+    def required_columns(self, model=None):
+        return list(self.features if model is None else model.features)
+
+    def produced_columns(self, keep_zscores=True, model=None):
+        zscores = [f"{col}_zscore" for col in self.required_columns(model)] if keep_zscores else []
+        return zscores + ["final_risk_score", "risk_band"]
+
+    @classmethod
+    def score_band(cls, risk, thresholds=None):
+        thresholds = cls.BAND_THRESHOLDS if thresholds is None else thresholds
+        for label, upper in zip(cls.BAND_LABELS, thresholds):
+            if risk < upper:
+                return label
+        return cls.BAND_LABELS[-1]
+
+    def assign_bands(self, scores, thresholds=None):
+        # digitize puts x in bin i when thresholds[i-1] <= x < thresholds[i], the same
+        # boundaries as score_band; NaN sorts past the last threshold, like score_band.
+        thresholds = self.band_thresholds if thresholds is None else thresholds
+        codes = np.digitize(np.asarray(scores, dtype=np.float64), thresholds)
+        return pd.Categorical.from_codes(codes, categories=self.BAND_LABELS, ordered=True)
+
+
+    def feature_matrix(self, data, features=None):
+        """The score features stacked column by column into one contiguous 2-D float array."""
+        features = self.features if features is None else features
+        missing = [col for col in features if col not in data.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}. Build features first!")
+        matrix = np.empty((len(data), len(features)), dtype=np.float64, order="F")
+        for j, col in enumerate(features):
+            matrix[:, j] = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return matrix
 
     @classmethod
-    def score_band(cls, risk):
-        if risk < 40:
-            return "Low Risk"
-        elif 40 <= risk < 70:
-            return "Medium Risk"
-        elif 70 <= risk < 90:
-            return "High Risk"
+    def feature_stats(cls, matrix):
+        """Per-feature mean and sample std, skipping NaNs like pandas.
+
+        Computed per block of STATS_BLOCK_ROWS rows and merged in row order, the same blocks
+        ParallelPipeline spreads over its workers, so both give bit-identical statistics.
+        """
+        blocks = range(0, max(len(matrix), 1), cls.STATS_BLOCK_ROWS)
+        return cls.moments_stats(cls.merge_moments(
+            [cls.matrix_moments(matrix[start:start + cls.STATS_BLOCK_ROWS]) for start in blocks]))
+
+    @staticmethod
+    def matrix_moments(matrix):
+        """Per-feature (count, mean, M2) of the non-NaN values of `matrix`."""
+        valid = ~np.isnan(matrix)
+        if valid.all():
+            count = np.full(matrix.shape[1], len(matrix), dtype=np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = matrix.sum(axis=0) / count
+            deviation = matrix - mean
         else:
-            return "Critical Risk"
+            count = valid.sum(axis=0).astype(np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(valid, matrix, 0.0).sum(axis=0) / count
+            deviation = np.where(valid, matrix - mean, 0.0)
+        return count, mean, (deviation * deviation).sum(axis=0)
 
+    @staticmethod
+    def merge_moments(parts):
+        """Merge (count, mean, M2) parts in order with the pairwise update of Chan et al."""
+        count, mean, m2 = parts[0]
+        for count_b, mean_b, m2_b in parts[1:]:
+            total = count + count_b
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = mean_b - mean
+                merged_mean = mean + delta * (count_b / total)
+                merged_m2 = m2 + m2_b + delta * delta * (count * count_b / total)
+            # A side without values has a NaN mean; the other side's moments stand as they are.
+            mean = np.where(count == 0, mean_b, np.where(count_b == 0, mean, merged_mean))
+            m2 = np.where(count == 0, m2_b, np.where(count_b == 0, m2, merged_m2))
+            count = total
+        return count, mean, m2
 
-    def compute_scores(self, data):
-        if data is not None:
+    @staticmethod
+    def moments_stats(moments):
+        """Mean and sample std (NaN below two values) from merged (count, mean, M2)."""
+        count, mean, m2 = moments
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+        return np.where(count > 0, mean, np.nan), std
 
-            numeric_cols = [
-                'count_transaction', 'avg_amount', 'total_amount',
-                'max_amount', 'daily_velocity_count', 'errorBalanceOrig'
-            ]
+    @staticmethod
+    def score_matrix(matrix, mean, std):
+        """Turn `matrix` in place into normal-CDF z-scores and return the mean per row x 100.
 
-            z_score_cols = []
-            for col in numeric_cols:
-                mean = data[col].mean()
-                std = data[col].std()
+        Features with zero spread contribute a z-score of 0, as they always have. The mean
+        skips NaNs and adds the features of a row in column order, so a row's score does
+        not depend on the other rows of the batch or on the matrix's memory layout.
+        """
+        flat = std == 0
+        matrix -= mean
+        matrix /= np.where(flat, 1.0, std)
+        ndtr(matrix, out=matrix)
+        matrix[:, flat] = 0.0
 
-                col_name = f'{col}_zscore'
-                if std != 0:
-                    z_val = (data[col] - mean) / std
+        total = np.zeros(len(matrix))
+        count = np.zeros(len(matrix))
+        for j in range(matrix.shape[1]):
+            column = matrix[:, j]
+            valid = ~np.isnan(column)
+            if valid.all():
+                total += column
+                count += 1
+            else:
+                total += np.where(valid, column, 0.0)
+                count += valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return total / count * 100
 
-                    data[col_name] = norm.cdf(z_val)
-                else:
-                    data[col_name] = 0
-                z_score_cols.append(col_name)
+    def fit(self, data):
+        """Freeze the feature statistics of `data` and this scorer's band thresholds into a model."""
+        if data is None or len(data) == 0:
+            raise ValueError("Dataframe is empty or None!")
+        return self.fit_matrix(self.feature_matrix(data))
 
-            data['final_risk_score'] = data[z_score_cols].mean(axis=1) * 100
-            data['risk_band']=data['final_risk_score'].apply(RiskScorer.score_band)
+    def fit_matrix(self, matrix):
+        mean, std = self.feature_stats(matrix)
+        return RiskModel(self.features, mean, std, self.band_thresholds, n_rows=len(matrix))
 
-            return data
+    def transform(self, data, model, keep_zscores=True):
+        """Score `data` with a fitted model: one pass over the rows, no column reductions."""
+        if data is None:
+            raise ValueError("Dataframe is empty or None!")
+        return self._write_scores(data, self.feature_matrix(data, model.features), model, keep_zscores)
+
+    def compute_scores(self, data, keep_zscores=True, model=None):
+        if data is not None:
+
+            if model is not None:
+                return self.transform(data, model, keep_zscores=keep_zscores)
+
+            # Fit and apply on the same frame, sharing the feature matrix between the two.
+            matrix = self.feature_matrix(data)
+            return self._write_scores(data, matrix, self.fit_matrix(matrix), keep_zscores)
 
         else:
-            raise ValueError ("Dataframe is empty or None!")
\ No newline at end of file
+            raise ValueError ("Dataframe is empty or None!")
+
+    def _write_scores(self, data, matrix, model, keep_zscores):
+        scores = self.score_matrix(matrix, model.mean, model.std)
+
+        # The per-feature z-scores are only kept for inspection; skipping them saves six columns.
+        if keep_zscores:
+            for j, col in enumerate(model.features):
+                data[f'{col}_zscore'] = matrix[:, j]
+
+        data['final_risk_score'] = scores
+
+        data['risk_band'] = self.assign_bands(data['final_risk_score'], model.band_thresholds)
+
+        return data
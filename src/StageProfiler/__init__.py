@@ -0,0 +1 @@
+from src.StageProfiler import stage_profiler
\ No newline at end of file
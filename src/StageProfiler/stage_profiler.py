@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process so far, or None where the OS does not report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def row_count(value):
+    """Rows of a frame-like value, None for anything else (paths, report results)."""
+    shape = getattr(value, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+class StageRecord:
+    """What one stage run cost: wall and CPU time, memory, and rows in and out."""
+
+    FIELDS = ["stage", "start_s", "wall_s", "cpu_s", "rows_in", "rows_out",
+              "peak_rss_mib", "rss_growth_mib", "alloc_peak_mib", "profile_path", "error"]
+
+    def __init__(self, stage, rows_in=None):
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.start_s = 0.0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_rss_mib = None
+        self.rss_growth_mib = None
+        self.alloc_peak_mib = None
+        self.profile_path = None
+        self.error = None
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class StageProfiler:
+    """Records a StageRecord per pipeline stage; cheap enough to leave on for every run.
+
+    Wall and CPU time and the process's peak RSS are always taken. tracemalloc (which slows
+    pure-Python code) and a cProfile/pyinstrument capture are opt-in, the latter only for
+    the stages named in `profile_stages`.
+    """
+
+    def __init__(self, trace_memory=False, profile_stages=(), profiler="cprofile", output_dir="profiles"):
+        if profiler not in PROFILERS:
+            raise ValueError(f"profiler must be one of: {', '.join(PROFILERS)}!")
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profiler = profiler
+        self.output_dir = output_dir
+        self.records = []
+        self._origin = time.perf_counter()
+
+    def clear(self):
+        self.records = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the body as stage `name`; set `rows_out` on the yielded record before leaving."""
+        record = StageRecord(name, rows_in)
+        capture = self._start_capture(name) if name in self.profile_stages else None
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        rss_before = peak_rss_mib()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_s = round(time.perf_counter() - start, 6)
+            record.cpu_s = round(time.process_time() - cpu_start, 6)
+            record.start_s = round(start - self._origin, 6)
+            if tracing:
+                record.alloc_peak_mib = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+                tracemalloc.stop()
+            record.peak_rss_mib = peak_rss_mib()
+            if rss_before is not None:
+                record.rss_growth_mib = round(record.peak_rss_mib - rss_before, 1)
+            if capture is not None:
+                record.profile_path = self._stop_capture(name, capture)
+            self.records.append(record)
+
+    def measure(self, name, func, *args, **kwargs):
+        """Call `func(*args, **kwargs)` as stage `name`, taking rows from its first argument and result."""
+        with self.stage(name, rows_in=row_count(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record.rows_out = row_count(result)
+        return result
+
+    def _start_capture(self, name):
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ValueError("pyinstrument is not installed: pip install pyinstrument")
+            capture = Profiler()
+        else:
+            import cProfile
+            capture = cProfile.Profile()
+        capture.enable() if self.profiler == "cprofile" else capture.start()
+        return capture
+
+    def _stop_capture(self, name, capture):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.profiler == "pyinstrument":
+            capture.stop()
+            path = os.path.join(self.output_dir, f"{name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(capture.output_html())
+        else:
+            capture.disable()
+            # Open with: python -m pstats <file>, or snakeviz.
+            path = os.path.join(self.output_dir, f"{name}.prof")
+            capture.dump_stats(path)
+        return path
+
+    def to_dict(self):
+        return {"trace_memory": self.trace_memory, "stages": [record.to_dict() for record in self.records]}
+
+    def save_json(self, path):
+        self._write(path, self.to_dict())
+        return path
+
+    def save_chrome_trace(self, path):
+        """Write the stages as a trace for chrome://tracing or https://ui.perfetto.dev."""
+        events = [{
+            "name": record.stage, "cat": "stage", "ph": "X", "pid": os.getpid(), "tid": 0,
+            "ts": round(record.start_s * 1e6), "dur": round(record.wall_s * 1e6),
+            "args": {k: v for k, v in record.to_dict().items() if v is not None and k not in ("stage", "start_s", "wall_s")},
+        } for record in self.records]
+        self._write(path, {"traceEvents": events, "displayTimeUnit": "ms"})
+        return path
+
+    def table(self, title="Stage Profile"):
+        from rich.table import Table
+
+        table = Table(title=title)
+        table.add_column("Stage", style="bold cyan")
+        table.add_column("Wall (s)", justify="right")
+        table.add_column("CPU (s)", justify="right")
+        table.add_column("Rows in", justify="right")
+        table.add_column("Rows out", justify="right")
+        table.add_column("Peak RSS (MiB)", justify="right")
+        table.add_column("Alloc peak (MiB)", justify="right")
+        table.add_column("Profile")
+
+        def cell(value, fmt="{:,}"):
+            return "-" if value is None else fmt.format(value)
+
+        for record in self.records:
+            stage = record.stage if record.error is None else f"[red]{record.stage} (failed)[/]"
+            table.add_row(stage, f"{record.wall_s:.3f}", f"{record.cpu_s:.3f}", cell(record.rows_in),
+                          cell(record.rows_out), cell(record.peak_rss_mib, "{:,.1f}"),
+                          cell(record.alloc_peak_mib, "{:,.1f}"), record.profile_path or "")
+        total = sum(record.wall_s for record in self.records)
+        table.add_row("[bold]TOTAL[/]", f"[bold]{total:.3f}[/]", f"{sum(r.cpu_s for r in self.records):.3f}",
+                      "", "", "", "", "")
+        return table
+
+    @staticmethod
+    def _write(path, payload):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
@@ -0,0 +1 @@
+from src.StreamScorer import stream_scorer
\ No newline at end of file
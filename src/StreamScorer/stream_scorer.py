@@ -0,0 +1,178 @@
+import sys
+import json
+import math
+import time
+import threading
+import socketserver
+from collections import deque
+import numpy as np
+import pandas as pd
+from src.FeatureBuilder.feature_state import FeatureState
+from src.RiskScore.risk_score import RiskScorer
+from src.TransactionFlagger.transaction_flagger import TransactionFlagger
+
+
+INPUT_FIELDS = ["step", "nameOrig", "amount", "oldbalanceOrg", "newbalanceOrig"]
+NUMERIC_FIELDS = ["step", "amount", "oldbalanceOrg", "newbalanceOrig"]
+STATE_FEATURES = [
+    "count_transaction", "total_amount", "avg_amount", "max_amount", "std_amount",
+    "z_score", "daily_velocity_count", "errorBalanceOrig",
+]
+
+
+def record_problems(record):
+    """What is wrong with one transaction dict, as messages; empty when it can be scored."""
+    if not isinstance(record, dict):
+        return ["not a transaction object"]
+    missing = [field for field in INPUT_FIELDS if field not in record]
+    if missing:
+        return [f"missing field(s): {', '.join(missing)}"]
+    problems = []
+    name = record["nameOrig"]
+    if not isinstance(name, str) or not name:
+        problems.append(f"nameOrig must be a non-empty string, got {name!r}")
+    for field in NUMERIC_FIELDS:
+        value = record[field]
+        # bool is an int subclass, but true/false is not an amount.
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            problems.append(f"{field} must be a finite number, got {value!r}")
+    return problems
+
+
+class LatencyTracker:
+    """Per-call latencies in milliseconds over the most recent `window` calls."""
+
+    def __init__(self, window=100_000):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.transactions = 0
+
+    def record(self, seconds, transactions=1):
+        self.samples.append(seconds * 1000)
+        self.calls += 1
+        self.transactions += transactions
+
+    def summary(self):
+        if not self.samples:
+            return {"calls": 0, "transactions": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+        p50, p99 = np.percentile(np.fromiter(self.samples, dtype=np.float64), [50, 99])
+        return {"calls": self.calls, "transactions": self.transactions,
+                "p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3),
+                "max_ms": round(max(self.samples), 3)}
+
+
+class StreamScorer:
+    """Scores transactions as they arrive against rolling per-customer state.
+
+    The customer aggregates are kept in a `FeatureState`, so every transaction sees the same
+    features `FeatureBuilder` would give it over all history so far. Normalization uses a
+    fitted `RiskModel`; recomputing the statistics per transaction would make a score depend
+    on whatever happened to arrive in the same micro-batch. The graph features need every
+    transfer at once, so the model must be fitted on the sending-account features only.
+    """
+
+    def __init__(self, state, model, scorer=None):
+        unknown = [col for col in model.features if col not in STATE_FEATURES]
+        if unknown:
+            raise ValueError(f"Model uses features the streaming state does not keep: {', '.join(unknown)}")
+        self.state = state
+        self.model = model
+        self.scorer = scorer or RiskScorer(features=model.features)
+        self.flagger = TransactionFlagger()
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, data, model=None, scorer=None):
+        """Seed the state with `data`; without a model, fit one on the full history."""
+        if data is None or data.empty:
+            raise ValueError("Dataframe is empty or None!")
+        scorer = scorer or RiskScorer(features=RiskScorer.ACCOUNT_FEATURES)
+        state = FeatureState()
+        history = state.update(data.copy())
+        return cls(state, model or scorer.fit(history), scorer=scorer)
+
+    def score(self, records):
+        """Score a list of transaction dicts, in order, and return one result dict per record."""
+        if not records:
+            return []
+        start = time.perf_counter()
+        # Checked before the state is touched: one NaN amount merged into a customer's running
+        # total, max and M2 would change the score of every later transaction of that customer.
+        invalid = []
+        for i, record in enumerate(records):
+            problems = record_problems(record)
+            if problems:
+                label = f"Transaction {i}"
+                if isinstance(record, dict) and "id" in record:
+                    label += f" (id {record['id']!r})"
+                invalid.append(f"{label}: {'; '.join(problems)}")
+        if invalid:
+            raise ValueError("Rejected, nothing was scored: " + " | ".join(invalid))
+
+        columns = {field: [record[field] for record in records] for field in INPUT_FIELDS}
+        names = np.array([str(name) for name in columns["nameOrig"]], dtype=object)
+        # The state is shared by every connection, and a batch must be merged and scored as one.
+        with self._lock:
+            features = self.state.update_columns(names, np.asarray(columns["step"]), columns["amount"],
+                                                 columns["oldbalanceOrg"], columns["newbalanceOrig"])
+            matrix = np.empty((len(records), len(self.model.features)), dtype=np.float64, order="F")
+            for j, col in enumerate(self.model.features):
+                matrix[:, j] = features[col]
+            scores = self.scorer.score_matrix(matrix, self.model.mean, self.model.std)
+            bands = self.scorer.assign_bands(scores, self.model.band_thresholds)
+            flags = self.flagger.is_suspicious(pd.DataFrame({"risk_band": bands}))["is_suspicious"].to_numpy()
+            self.latency.record(time.perf_counter() - start, len(records))
+
+        results = []
+        for i, record in enumerate(records):
+            result = {"nameOrig": names[i], "step": int(columns["step"][i]),
+                      "final_risk_score": round(float(scores[i]), 6),
+                      "risk_band": bands[i], "is_suspicious": bool(flags[i])}
+            if "id" in record:
+                result = {"id": record["id"], **result}
+            results.append(result)
+        return results
+
+    def handle_line(self, line):
+        """One JSON line in (a transaction object or a list of them), one JSON line out."""
+        try:
+            message = json.loads(line)
+            if isinstance(message, dict):
+                return json.dumps(self.score([message])[0])
+            if isinstance(message, list):
+                return json.dumps(self.score(message))
+            raise ValueError("Expected a transaction object or a list of them")
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def serve_stdin(self, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        for line in stdin:
+            if line.strip():
+                stdout.write(self.handle_line(line) + "\n")
+                stdout.flush()
+
+    def make_server(self, host="127.0.0.1", port=8765):
+        """A TCP server speaking the same JSON-lines protocol; port 0 picks a free port."""
+        scorer = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        self.wfile.write((scorer.handle_line(line) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+
+        server = socketserver.ThreadingTCPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+    def serve_socket(self, host="127.0.0.1", port=8765):
+        with self.make_server(host, port) as server:
+            print(f"Scoring on {host}:{server.server_address[1]} (Ctrl+C to stop)", file=sys.stderr, flush=True)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
@@ -1,11 +1,21 @@
 class TransactionFlagger:
+    REQUIRED_COLUMNS = ["risk_band"]
+    PRODUCED_COLUMNS = ["is_suspicious"]
+    SUSPICIOUS_BANDS = ["High Risk", "Critical Risk"]
+
     def __init__(self):
         pass
 
+    def required_columns(self):
+        return list(self.REQUIRED_COLUMNS)
+
+    def produced_columns(self):
+        return list(self.PRODUCED_COLUMNS)
+
     def is_suspicious(self,data):
 
         if data is not None:
-            data["is_suspicious"]=data["risk_band"].isin(["High Risk","Critical Risk"])
+            data["is_suspicious"]=data["risk_band"].isin(self.SUSPICIOUS_BANDS)
             return data
 
 